@@ -6,11 +6,17 @@ Rendimiento = Σ(Cuotas de Acertados) - Total de Apuestas
 import pandas as pd
 import numpy as np
 
+# Variables a analizar
+VARIABLES = ['Mejor_Cuota', 'Score_Final', 'Mejor_Casa', 'Diferencia_Cuota_Promedio', 'Volatilidad_Pct', 'Margen_Casa_Pct']
+
+# Columnas que usa el análisis (el resto del CSV no se parsea)
+COLUMNAS = set(VARIABLES) | {'Mercado', 'Resultado'}
+
 # Cargar datos
-df = pd.read_csv('analisis_mercados_20251125_065555.csv')
+df = pd.read_csv('analisis_mercados_20251125_065555.csv', usecols=lambda c: c in COLUMNAS)
 
-# Variables a analizar
-variables = ['Mejor_Cuota', 'Score_Final', 'Mejor_Casa', 'Diferencia_Cuota_Promedio', 'Volatilidad_Pct', 'Margen_Casa_Pct']
+# Analizar solo las variables presentes en el CSV (se calcula una vez)
+variables = [v for v in VARIABLES if v in df.columns]
 
 # Obtener mercados únicos
 mercados = df['Mercado'].unique()
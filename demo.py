@@ -143,11 +143,12 @@ def main():
     
     # Generar reportes
     report_generator = reporter.ReportGenerator()
+    generated_at = datetime.now()  # mismo timestamp para todos los reportes
     
     # Tabla completa
     print("📋 REPORTE COMPLETO:")
     print("-" * 30)
-    complete_report = report_generator.generate_analysis_table(demo_results, show_all=True)
+    complete_report = report_generator.generate_analysis_table(demo_results, show_all=True, now=generated_at)
     print(complete_report)
     print("\n")
     
@@ -161,7 +162,7 @@ def main():
     # Estadísticas
     print("📈 ESTADÍSTICAS:")
     print("-" * 20)
-    stats = report_generator.generate_summary_stats(demo_results)
+    stats = report_generator.generate_summary_stats(demo_results, now=generated_at)
     for key, value in stats.items():
         if isinstance(value, dict):
             print(f"{key.replace('_', ' ').title()}:")
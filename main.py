@@ -217,13 +217,14 @@ def analyze(min_probability, min_odds, hours_ahead, hours_from, show_all, export
             
             click.echo("\n" + "="*80)
             
-            # Generar CSV combinado
+            # Generar CSV combinado (un solo timestamp para el nombre y los reportes)
+            now = datetime.now()
             csv_filename = export_csv
             if not csv_filename:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                timestamp = now.strftime("%Y%m%d_%H%M%S")
                 csv_filename = f"analisis_mercados_{timestamp}.csv"
             
-            csv_path = reporter.generate_combined_csv(results, output_dir=".")
+            csv_path = reporter.generate_combined_csv(results, output_dir=".", now=now)
             total_markets = len(results)
             
             click.echo(f"\n💾 Archivo CSV generado:")
@@ -1,14 +1,20 @@
+import bisect
 import logging
 import asyncio
+import httpx
+import numpy as np
+from itertools import chain
+from operator import attrgetter, itemgetter
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timezone, timedelta
 from tqdm import tqdm
 from .models import (
-    Match, MatchOdds, OddsData, AnalysisResult, 
+    Match, MatchOdds, OddsData, H2HOdds, AnalysisResult, 
     MarketType, ValidationError
 )
 from .apis.the_odds_api import TheOddsAPIClient
 from .apis.odds_api_io import OddsAPIIOClient
+from .kernels.volatility import pad_odds, batch_volatility
 
 
 class FootballOddsAnalyzer:
@@ -18,13 +24,20 @@ class FootballOddsAnalyzer:
     """
     
     def __init__(self):
-        self.odds_client = TheOddsAPIClient()
-        self.bwin_client = OddsAPIIOClient()
+        # Un único cliente HTTP compartido: un solo pool de conexiones keep-alive
+        self._http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            headers={"User-Agent": "FootballBettingAnalyzer/1.0"},
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=300)
+        )
+        self.odds_client = TheOddsAPIClient(client=self._http_client)
+        self.bwin_client = OddsAPIIOClient(client=self._http_client)
         self.logger = logging.getLogger(__name__)
         
         # Configuración por defecto
         self.min_probability = 0.7
         self.min_odds = 1.30
+        self.max_concurrency = 10  # Partidos procesados en paralelo
     
     async def get_upcoming_matches(self, hours_ahead: int = 168, hours_from: int = 0) -> List[Match]:
         """
@@ -46,32 +59,44 @@ class FootballOddsAnalyzer:
             start_time = now + timedelta(hours=hours_from)
             cutoff_time = now + timedelta(hours=hours_ahead)
             
-            upcoming_matches = [
-                match for match in all_matches
-                if start_time <= match.kickoff_time <= cutoff_time
-            ]
+            # Ordenar por hora de inicio y recortar la ventana con búsqueda binaria
+            all_matches.sort(key=attrgetter("kickoff_time"))
+            kickoff_times = [match.kickoff_time for match in all_matches]
+            lo = bisect.bisect_left(kickoff_times, start_time)
+            hi = bisect.bisect_right(kickoff_times, cutoff_time)
+            upcoming_matches = all_matches[lo:hi]
             
-            self.logger.info(f"Encontrados {len(upcoming_matches)} partidos reales en {hours_ahead} horas")
+            self.logger.info("Encontrados %d partidos reales en %d horas", len(upcoming_matches), hours_ahead)
             return upcoming_matches
             
         except Exception as e:
-            self.logger.error(f"Error obteniendo partidos de The Odds API: {e}")
+            self.logger.error("Error obteniendo partidos de The Odds API: %s", e)
             raise ValidationError(f"No se pudieron obtener partidos: {e}")
     
-    async def get_match_odds_data(self, match: Match) -> MatchOdds:
+    async def get_match_odds_data(
+        self,
+        match: Match,
+        prefetched_odds: Optional[Tuple[List[OddsData], List[H2HOdds]]] = None
+    ) -> MatchOdds:
         """
         Obtiene cuotas completas para un partido específico
         
         Args:
             match: Partido para obtener cuotas
+            prefetched_odds: Cuotas (doble chance, H2H) ya obtenidas en bloque para la liga.
+                Si se proporcionan, se omite la llamada individual a The Odds API
             
         Returns:
             Cuotas organizadas por mercado
         """
         try:
-            # Obtener cuotas del proveedor principal con sport_key correcto
-            sport_key = getattr(match, 'sport_key', 'soccer_epl')  # Usar sport_key del match
-            odds_data, h2h_odds = await self.odds_client.get_match_odds(match.id, sport_key)
+            if prefetched_odds is not None:
+                # Copiar para no modificar el bloque compartido al agregar Bwin
+                odds_data, h2h_odds = list(prefetched_odds[0]), list(prefetched_odds[1])
+            else:
+                # Obtener cuotas del proveedor principal con sport_key correcto
+                sport_key = getattr(match, 'sport_key', 'soccer_epl')  # Usar sport_key del match
+                odds_data, h2h_odds = await self.odds_client.get_match_odds(match.id, sport_key)
             
             # Intentar obtener cuotas de Bwin desde Odds-API.io
             try:
@@ -80,10 +105,10 @@ class FootballOddsAnalyzer:
                 if bwin_odds_data:
                     odds_data.extend(bwin_odds_data)
                     h2h_odds.extend(bwin_h2h_odds)
-                    self.logger.info(f"Cuotas de Bwin agregadas para {match.home_team} vs {match.away_team}")
+                    self.logger.info("Cuotas de Bwin agregadas para %s vs %s", match.home_team, match.away_team)
                     
             except Exception as bwin_error:
-                self.logger.warning(f"Error obteniendo cuotas de Bwin: {bwin_error}")
+                self.logger.warning("Error obteniendo cuotas de Bwin: %s", bwin_error)
             
             # Organizar por mercado
             odds_1x = [odds for odds in odds_data if odds.market == MarketType.DOUBLE_CHANCE_1X]
@@ -96,11 +121,11 @@ class FootballOddsAnalyzer:
                 odds_h2h=h2h_odds
             )
             
-            self.logger.debug(f"Obtenidas cuotas para {match}: 1X={len(odds_1x)}, X2={len(odds_x2)}, H2H={len(h2h_odds)}")
+            self.logger.debug("Obtenidas cuotas para %s: 1X=%d, X2=%d, H2H=%d", match, len(odds_1x), len(odds_x2), len(h2h_odds))
             return match_odds
             
         except Exception as e:
-            self.logger.warning(f"No se pudieron obtener cuotas para {match}: {e}")
+            self.logger.warning("No se pudieron obtener cuotas para %s: %s", match, e)
             # Devolver estructura vacía en caso de error
             return MatchOdds(match=match, odds_1x=[], odds_x2=[], odds_h2h=[])
     
@@ -123,7 +148,7 @@ class FootballOddsAnalyzer:
             totals_results = self._analyze_grouped_market(match, totals_data, MarketType.TOTALS)
             results.extend(totals_results)
         except Exception as e:
-            self.logger.warning(f"Error analizando TOTALS para {match}: {e}")
+            self.logger.warning("Error analizando TOTALS para %s: %s", match, e)
         
         return results
     
@@ -144,102 +169,84 @@ class FootballOddsAnalyzer:
         
         results = []
         
+        # El tipo de mercado no cambia dentro del bucle: resolver una sola vez
+        is_totals = market_type is MarketType.TOTALS
+        is_btts = market_type is MarketType.BTTS
+        
         # Agrupar por market_name y point
-        from collections import defaultdict
-        markets_dict = defaultdict(list)
+        markets_dict = {}
+        
+        # Índice (bookmaker, market_name, point) -> cuota para buscar pares complementarios en O(1)
+        odds_index = {}
         
         for odds_info in odds_data:
-            key = odds_info["market_name"]
-            if odds_info.get("point"):
-                key = f"{odds_info['market_name']} {odds_info['point']}"
-            markets_dict[key].append(odds_info)
+            name = odds_info["market_name"]
+            point = odds_info.get("point")
+            key = f"{name} {point}" if point else name
+            markets_dict.setdefault(key, []).append(odds_info)
+            odds_index.setdefault((odds_info["bookmaker"], name, point), odds_info)
+        
+        # Volatilidad de todos los mercados en una sola llamada vectorizada
+        volatilities = self._calculate_volatilities(
+            [[o["odds"] for o in odds_list] for odds_list in markets_dict.values()]
+        )
         
         # Analizar cada mercado único
-        for market_name, odds_list in markets_dict.items():
+        for (market_name, odds_list), volatility in zip(markets_dict.items(), volatilities):
             if not odds_list or len(odds_list) <= 1:
                 continue
             
+            # Una sola pasada: mejor cuota, suma de cuotas y casas de apuestas
+            best = odds_list[0]
+            total_odds = 0.0
+            all_bookmakers = set()
+            for o in odds_list:
+                value = o["odds"]
+                if value > best["odds"]:
+                    best = o
+                total_odds += value
+                all_bookmakers.add(o["bookmaker"])
+            
             # Filtrar mercados con menos de 2 casas de apuestas
-            bookmakers_count = len(set(o["bookmaker"] for o in odds_list))
-            if bookmakers_count < 2:
+            if len(all_bookmakers) < 2:
                 continue
             
-            # Obtener la mejor cuota
-            best = max(odds_list, key=lambda x: x["odds"])
-            
             # Calcular promedio de cuotas
-            avg_odds = sum(o["odds"] for o in odds_list) / len(odds_list) if odds_list else 0
-            
-            # Calcular volatilidad
-            volatility = self._calculate_volatility([o["odds"] for o in odds_list])
+            avg_odds = total_odds / len(odds_list)
+            best_odds = best["odds"]
+            prob_best = 1 / best_odds
             
             # Calcular margen del bookmaker y promedio del mercado
             bookmaker_margin = None
             avg_market_margin = None
             
-            # Buscar el par complementario para calcular margen (solo para TOTALS)
-            if market_type == MarketType.TOTALS:
+            # Buscar el par complementario para calcular margen (TOTALS y BTTS)
+            opposite_base = None
+            if is_totals:
                 # Para totals: buscar Over/Under del mismo punto
-                is_over = "Over" in market_name
-                point = best.get("point")
-                opposite_name = f"{'Under' if is_over else 'Over'} {point}"
-                
-                opposite_odds = [o for o in odds_data 
-                               if o["bookmaker"] == best["bookmaker"] 
-                               and f"{o['market_name']} {o.get('point')}" == opposite_name]
-                
-                if opposite_odds:
-                    prob_current = 1 / best["odds"]
-                    prob_opposite = 1 / opposite_odds[0]["odds"]
-                    bookmaker_margin = round((prob_current + prob_opposite - 1) * 100, 2)
-                
-                # Calcular margen promedio de todas las casas
-                all_bookmakers = set(o["bookmaker"] for o in odds_list)
-                margins = []
-                for bookie in all_bookmakers:
-                    current_odds_bookie = [o for o in odds_data 
-                                          if o["bookmaker"] == bookie 
-                                          and f"{o['market_name']} {o.get('point')}" == market_name]
-                    opposite_odds_bookie = [o for o in odds_data 
-                                           if o["bookmaker"] == bookie 
-                                           and f"{o['market_name']} {o.get('point')}" == opposite_name]
-                    
-                    if current_odds_bookie and opposite_odds_bookie:
-                        prob_c = 1 / current_odds_bookie[0]["odds"]
-                        prob_o = 1 / opposite_odds_bookie[0]["odds"]
-                        margin = (prob_c + prob_o - 1) * 100
-                        margins.append(margin)
-                
-                if margins:
-                    avg_market_margin = round(sum(margins) / len(margins), 2)
-            
-            elif market_type == MarketType.BTTS:
+                opposite_base = "Under" if "Over" in market_name else "Over"
+            elif is_btts:
                 # Para BTTS: buscar Yes/No
-                opposite_name = "No" if market_name == "Yes" else "Yes"
-                
-                opposite_odds = [o for o in odds_data 
-                               if o["bookmaker"] == best["bookmaker"] 
-                               and o["market_name"] == opposite_name]
+                opposite_base = "No" if market_name == "Yes" else "Yes"
+            
+            if opposite_base is not None:
+                current_base = best["market_name"]
+                point = best.get("point")
                 
-                if opposite_odds:
-                    prob_current = 1 / best["odds"]
-                    prob_opposite = 1 / opposite_odds[0]["odds"]
-                    bookmaker_margin = round((prob_current + prob_opposite - 1) * 100, 2)
+                opposite = odds_index.get((best["bookmaker"], opposite_base, point))
+                if opposite:
+                    prob_opposite = 1 / opposite["odds"]
+                    bookmaker_margin = round((prob_best + prob_opposite - 1) * 100, 2)
                 
                 # Calcular margen promedio de todas las casas
-                all_bookmakers = set(o["bookmaker"] for o in odds_list)
                 margins = []
                 for bookie in all_bookmakers:
-                    current_odds_bookie = [o for o in odds_data 
-                                          if o["bookmaker"] == bookie 
-                                          and o["market_name"] == market_name]
-                    opposite_odds_bookie = [o for o in odds_data 
-                                           if o["bookmaker"] == bookie 
-                                           and o["market_name"] == opposite_name]
+                    current_bookie = odds_index.get((bookie, current_base, point))
+                    opposite_bookie = odds_index.get((bookie, opposite_base, point))
                     
-                    if current_odds_bookie and opposite_odds_bookie:
-                        prob_c = 1 / current_odds_bookie[0]["odds"]
-                        prob_o = 1 / opposite_odds_bookie[0]["odds"]
+                    if current_bookie and opposite_bookie:
+                        prob_c = 1 / current_bookie["odds"]
+                        prob_o = 1 / opposite_bookie["odds"]
                         margin = (prob_c + prob_o - 1) * 100
                         margins.append(margin)
                 
@@ -247,18 +254,18 @@ class FootballOddsAnalyzer:
                     avg_market_margin = round(sum(margins) / len(margins), 2)
             
             # Formatear todas las cuotas
-            all_odds_formatted = "; ".join([
-                f"{o['bookmaker'].value}:{o['odds']}" 
-                for o in sorted(odds_list, key=lambda x: x["odds"], reverse=True)
-            ])
+            all_odds_formatted = "; ".join(
+                f"{o['bookmaker'].value}:{o['odds']}"
+                for o in sorted(odds_list, key=itemgetter("odds"), reverse=True)
+            )
             
             # Crear resultado
             result = AnalysisResult(
                 match=match,
                 market=market_type,
                 market_name=market_name,
-                best_odds=best["odds"],
-                implied_probability=round(1 / best["odds"], 3),
+                best_odds=best_odds,
+                implied_probability=round(prob_best, 3),
                 bookmaker=best["bookmaker"],
                 meets_criteria=True,  # Siempre True, ordenar por score
                 min_prob_threshold=self.min_probability,
@@ -299,100 +306,143 @@ class FootballOddsAnalyzer:
         
         # Calcular margen promedio del mercado H2H (base para todos los mercados derivados)
         avg_margin = match_odds.avg_overround_percentage if match_odds.odds_h2h else None
+        # Redondear una sola vez: el mismo valor se usa para 1X y X2
+        avg_margin = round(avg_margin, 2) if avg_margin else None
         
-        # Analizar mercado 1X
-        best_1x = match_odds.best_1x_odds
-        if best_1x and len(match_odds.odds_1x) > 1:  # Filtrar si solo hay 1 casa
-            implied_prob = best_1x.implied_probability
-            # Calcular sin filtros booleanos - rankear por Score_Final
-            meets_criteria = True  # Siempre True, el ranking se hace por score
-            
-            # Encontrar el margen del bookmaker específico que ofrece la mejor cuota 1X
-            bookmaker_margin = None
-            if match_odds.odds_h2h:
-                bookmaker_h2h = next(
-                    (h for h in match_odds.odds_h2h if h.bookmaker == best_1x.bookmaker),
-                    None
-                )
-                if bookmaker_h2h:
-                    bookmaker_margin = round(bookmaker_h2h.overround_percentage, 2)
-            
-            # Calcular volatilidad (desviación estándar) de las cuotas 1X
-            volatility = self._calculate_volatility([odds.odds for odds in match_odds.odds_1x])
-            
-            # Formatear todas las cuotas 1X
-            all_odds_formatted = "; ".join([
-                f"{odds.bookmaker.value}:{odds.odds}"
-                for odds in sorted(match_odds.odds_1x, key=lambda x: x.odds, reverse=True)
-            ])
-            
-            result = AnalysisResult(
-                match=match_odds.match,
-                market=MarketType.DOUBLE_CHANCE_1X,
-                market_name="1X",
-                best_odds=best_1x.odds,
-                implied_probability=round(implied_prob, 3),
-                bookmaker=best_1x.bookmaker,
-                meets_criteria=meets_criteria,
-                min_prob_threshold=min_prob,
-                min_odds_threshold=min_odds_threshold,
-                bookmaker_margin=bookmaker_margin,
-                avg_market_margin=round(avg_margin, 2) if avg_margin else None,
-                avg_market_odds=round(match_odds.avg_1x_odds, 4) if match_odds.avg_1x_odds > 0 else None,
-                volatility_std=volatility,
-                num_bookmakers=len(match_odds.odds_1x),
-                all_odds_formatted=all_odds_formatted,
-                match_odds=match_odds
+        # Cuotas H2H por bookmaker para obtener el margen de la mejor casa en O(1)
+        h2h_by_bookmaker = match_odds.h2h_by_bookmaker
+        
+        # Analizar mercados 1X y X2 (misma lógica, distinto mercado)
+        sides = (
+            (MarketType.DOUBLE_CHANCE_1X, match_odds.odds_1x),
+            (MarketType.DOUBLE_CHANCE_X2, match_odds.odds_x2),
+        )
+        
+        # Volatilidad de ambos lados en una sola llamada vectorizada
+        volatilities = self._calculate_volatilities(
+            [[odds.odds for odds in odds_list] for _, odds_list in sides]
+        )
+        
+        for (market, odds_list), volatility in zip(sides, volatilities):
+            result = self._analyze_double_chance_side(
+                match_odds, market, odds_list, h2h_by_bookmaker,
+                avg_margin, volatility, min_prob, min_odds_threshold
             )
-            results.append(result)
+            if result:
+                results.append(result)
+        
+        return results
+    
+    def _analyze_double_chance_side(
+        self,
+        match_odds: MatchOdds,
+        market: MarketType,
+        odds_list: List[OddsData],
+        h2h_by_bookmaker: Dict,
+        avg_margin: Optional[float],
+        volatility: Optional[float],
+        min_prob: float,
+        min_odds_threshold: float
+    ) -> Optional[AnalysisResult]:
+        """
+        Analiza un lado del mercado doble chance (1X o X2)
         
-        # Analizar mercado X2
-        best_x2 = match_odds.best_x2_odds
-        if best_x2 and len(match_odds.odds_x2) > 1:  # Filtrar si solo hay 1 casa
-            implied_prob = best_x2.implied_probability
-            # Calcular sin filtros booleanos - rankear por Score_Final
-            meets_criteria = True  # Siempre True, el ranking se hace por score
+        Args:
+            match_odds: Cuotas del partido
+            market: Mercado a analizar (DOUBLE_CHANCE_1X o DOUBLE_CHANCE_X2)
+            odds_list: Cuotas del mercado de todas las casas
+            h2h_by_bookmaker: Cuotas H2H indexadas por bookmaker
+            avg_margin: Margen promedio del mercado H2H (ya redondeado)
+            volatility: Volatilidad de las cuotas del mercado (en porcentaje)
+            min_prob: Probabilidad mínima requerida
+            min_odds_threshold: Cuota mínima requerida
             
-            # Encontrar el margen del bookmaker específico que ofrece la mejor cuota X2
-            bookmaker_margin = None
-            if match_odds.odds_h2h:
-                bookmaker_h2h = next(
-                    (h for h in match_odds.odds_h2h if h.bookmaker == best_x2.bookmaker),
-                    None
-                )
-                if bookmaker_h2h:
-                    bookmaker_margin = round(bookmaker_h2h.overround_percentage, 2)
-            
-            # Calcular volatilidad (desviación estándar) de las cuotas X2
-            volatility = self._calculate_volatility([odds.odds for odds in match_odds.odds_x2])
-            
-            # Formatear todas las cuotas X2
-            all_odds_formatted = "; ".join([
-                f"{odds.bookmaker.value}:{odds.odds}"
-                for odds in sorted(match_odds.odds_x2, key=lambda x: x.odds, reverse=True)
-            ])
+        Returns:
+            Resultado del análisis o None si hay menos de 2 casas
+        """
+        if len(odds_list) <= 1:  # Filtrar si solo hay 1 casa
+            return None
+        
+        # Una sola pasada: mejor cuota y suma de cuotas
+        best = odds_list[0]
+        total_odds = 0.0
+        for odds in odds_list:
+            value = odds.odds
+            if value > best.odds:
+                best = odds
+            total_odds += value
+        
+        avg_odds = total_odds / len(odds_list)
+        best_odds = best.odds
+        
+        # Calcular sin filtros booleanos - rankear por Score_Final
+        meets_criteria = True  # Siempre True, el ranking se hace por score
+        
+        # Encontrar el margen del bookmaker específico que ofrece la mejor cuota
+        bookmaker_margin = None
+        bookmaker_h2h = h2h_by_bookmaker.get(best.bookmaker)
+        if bookmaker_h2h:
+            bookmaker_margin = round(bookmaker_h2h.overround_percentage, 2)
+        
+        # Formatear todas las cuotas del mercado
+        all_odds_formatted = "; ".join(
+            f"{odds.bookmaker.value}:{odds.odds}"
+            for odds in sorted(odds_list, key=attrgetter("odds"), reverse=True)
+        )
+        
+        return AnalysisResult(
+            match=match_odds.match,
+            market=market,
+            market_name=market.value,
+            best_odds=best_odds,
+            implied_probability=round(1 / best_odds, 3),
+            bookmaker=best.bookmaker,
+            meets_criteria=meets_criteria,
+            min_prob_threshold=min_prob,
+            min_odds_threshold=min_odds_threshold,
+            bookmaker_margin=bookmaker_margin,
+            avg_market_margin=avg_margin,
+            avg_market_odds=round(avg_odds, 4) if avg_odds > 0 else None,
+            volatility_std=volatility,
+            num_bookmakers=len(odds_list),
+            all_odds_formatted=all_odds_formatted,
+            match_odds=match_odds
+        )
+    
+    async def _analyze_match(
+        self,
+        match: Match,
+        prefetched_odds: Optional[Tuple[List[OddsData], List[H2HOdds]]],
+        min_probability: float,
+        min_odds: float
+    ) -> Tuple[List[AnalysisResult], bool]:
+        """
+        Analiza todos los mercados de un partido
+        
+        Args:
+            match: Partido para analizar
+            prefetched_odds: Cuotas h2h ya obtenidas en bloque (None para pedirlas al API)
+            min_probability: Probabilidad implícita mínima
+            min_odds: Cuota mínima
             
-            result = AnalysisResult(
-                match=match_odds.match,
-                market=MarketType.DOUBLE_CHANCE_X2,
-                market_name="X2",
-                best_odds=best_x2.odds,
-                implied_probability=round(implied_prob, 3),
-                bookmaker=best_x2.bookmaker,
-                meets_criteria=meets_criteria,
-                min_prob_threshold=min_prob,
-                min_odds_threshold=min_odds_threshold,
-                bookmaker_margin=bookmaker_margin,
-                avg_market_margin=round(avg_margin, 2) if avg_margin else None,
-                avg_market_odds=round(match_odds.avg_x2_odds, 4) if match_odds.avg_x2_odds > 0 else None,
-                volatility_std=volatility,
-                num_bookmakers=len(match_odds.odds_x2),
-                all_odds_formatted=all_odds_formatted,
-                match_odds=match_odds
-            )
-            results.append(result)
+        Returns:
+            Tupla con (resultados del partido, si se encontraron cuotas)
+        """
+        results = []
         
-        return results
+        # Doble chance (1X, X2) y mercados adicionales (TOTALS) son independientes:
+        # se piden en paralelo en lugar de uno detrás de otro
+        match_odds, additional_results = await asyncio.gather(
+            self.get_match_odds_data(match, prefetched_odds),
+            self.analyze_additional_markets(match)
+        )
+        
+        has_double_chance = bool(match_odds.odds_1x or match_odds.odds_x2)
+        if has_double_chance:
+            results.extend(self.analyze_match_odds(match_odds, min_probability, min_odds))
+        results.extend(additional_results)
+        
+        return results, has_double_chance or bool(additional_results)
     
     async def analyze_all_matches(
         self,
@@ -425,22 +475,42 @@ class FootballOddsAnalyzer:
                 return []
             
             # 2. Priorizar partidos cercanos (optimización para reducir 404s)
+            # El orden de la lista es también el orden final de los resultados
+            match_order = attrgetter("kickoff_time", "home_team")
             if prioritize_near_matches:
                 now = datetime.now(timezone.utc)
                 priority_cutoff = now + timedelta(hours=72)  # Próximas 72 horas
                 
-                # Separar en partidos cercanos y lejanos
-                near_matches = [m for m in matches if m.kickoff_time <= priority_cutoff]
-                far_matches = [m for m in matches if m.kickoff_time > priority_cutoff]
+                # Separar en partidos cercanos y lejanos (una sola pasada)
+                near_matches, far_matches = [], []
+                for m in matches:
+                    (near_matches if m.kickoff_time <= priority_cutoff else far_matches).append(m)
                 
-                # Ordenar cercanos por tiempo (más cercanos primero)
-                near_matches.sort(key=lambda m: m.kickoff_time)
+                # Ordenar por tiempo (más cercanos primero)
+                near_matches.sort(key=match_order)
+                far_matches.sort(key=match_order)
                 
-                self.logger.info(f"Priorizando {len(near_matches)} partidos cercanos (<72h), {len(far_matches)} lejanos")
+                self.logger.info("Priorizando %d partidos cercanos (<72h), %d lejanos", len(near_matches), len(far_matches))
                 matches = near_matches + far_matches  # Procesar cercanos primero
+            else:
+                matches.sort(key=match_order)
+            
+            # Limita las peticiones simultáneas (bloques por liga y luego partidos)
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            
+            # 3. Obtener cuotas h2h en bloque: una llamada por liga en lugar de una por partido.
+            # Las ligas se piden en paralelo; get_odds_bulk devuelve None si falla
+            # (los partidos de esa liga pasan a pedirse uno a uno)
+            async def fetch_bulk(sport_key: str):
+                async with semaphore:
+                    return await self.odds_client.get_odds_bulk(sport_key)
             
-            # 3. Obtener cuotas para cada partido
-            all_results = []
+            sport_keys = list(dict.fromkeys(m.sport_key for m in matches))
+            bulk_results = await asyncio.gather(*(fetch_bulk(sport_key) for sport_key in sport_keys))
+            bulk_odds = dict(zip(sport_keys, bulk_results))
+            
+            # 4. Obtener cuotas para cada partido (un hueco por partido, en orden)
+            results_by_match: List[List[AnalysisResult]] = [[] for _ in matches]
             successful_odds = 0
             no_odds_available = 0
             
@@ -460,109 +530,77 @@ class FootballOddsAnalyzer:
             
             last_remaining = initial_requests
             
-            for i, match in enumerate(matches, 1):
-                try:
-                    # Analizar mercado doble chance (1X, X2)
-                    match_odds = await self.get_match_odds_data(match)
-                    
-                    # Si hay cuotas disponibles, analizar
-                    if match_odds.odds_1x or match_odds.odds_x2:
-                        match_results = self.analyze_match_odds(
-                            match_odds, min_probability, min_odds
+            # Procesar partidos en paralelo, limitando las peticiones simultáneas
+            async def process(index: int, match: Match) -> None:
+                nonlocal successful_odds, no_odds_available, last_remaining
+                
+                async with semaphore:
+                    try:
+                        # Si la liga se obtuvo en bloque, un partido ausente no tiene cuotas aún
+                        sport_odds = bulk_odds.get(match.sport_key)
+                        prefetched = sport_odds.get(match.id, ([], [])) if sport_odds is not None else None
+                        match_results, has_odds = await self._analyze_match(
+                            match, prefetched, min_probability, min_odds
                         )
-                        all_results.extend(match_results)
-                        successful_odds += 1
-                    
-                    # Analizar mercados adicionales (TOTALS, BTTS, H2H_Q1)
-                    additional_results = await self.analyze_additional_markets(match)
-                    if additional_results:
-                        all_results.extend(additional_results)
-                        if not (match_odds.odds_1x or match_odds.odds_x2):
-                            successful_odds += 1
-                    
-                    if not (match_odds.odds_1x or match_odds.odds_x2) and not additional_results:
-                        no_odds_available += 1
-                    
-                    # Actualizar barra con requests consumidos cada 3 partidos
-                    if i % 3 == 0:
-                        try:
-                            current_remaining = await self.odds_client.get_remaining_requests()
-                            consumed = last_remaining - current_remaining
-                            if consumed > 0:
-                                pbar.update(consumed)
-                                last_remaining = current_remaining
-                        except:
-                            pass
-                    
-                    # Rate limiting - pausa pequeña entre requests
-                    await asyncio.sleep(0.5)
-                    
-                except Exception as e:
-                    self.logger.error(f"Error analizando {match}: {e}")
-                    continue
+                    except Exception as e:
+                        self.logger.error("Error analizando %s: %s", match, e)
+                        return
+                
+                # Ordenar solo los mercados del partido (pocos elementos)
+                if len(match_results) > 1:
+                    match_results.sort(key=attrgetter("market.value"))
+                results_by_match[index] = match_results
+                if has_odds:
+                    successful_odds += 1
+                else:
+                    no_odds_available += 1
+                
+                # Actualizar barra con la quota informada en las cabeceras de cada respuesta
+                current_remaining = self.odds_client.last_remaining
+                if current_remaining is not None and current_remaining < last_remaining:
+                    pbar.update(last_remaining - current_remaining)
+                    last_remaining = current_remaining
             
-            # Actualización final
-            try:
-                final_remaining = await self.odds_client.get_remaining_requests()
-                final_consumed = last_remaining - final_remaining
-                if final_consumed > 0:
-                    pbar.update(final_consumed)
-            except:
-                pass
+            # TaskGroup espera a todos los partidos y cancela el resto ante un error no controlado
+            async with asyncio.TaskGroup() as task_group:
+                for index, match in enumerate(matches):
+                    task_group.create_task(process(index, match))
             
             pbar.close()
             
+            # 5. Unir resultados: los partidos ya están ordenados, no hace falta ordenar todo
+            all_results = list(chain.from_iterable(results_by_match))
+            
             # Resumen final
             self.logger.info(
-                f"Análisis completado: {successful_odds} partidos con cuotas, "
-                f"{no_odds_available} sin cuotas disponibles, "
-                f"{len(all_results)} mercados analizados"
+                "Análisis completado: %d partidos con cuotas, "
+                "%d sin cuotas disponibles, "
+                "%d mercados analizados",
+                successful_odds, no_odds_available, len(all_results)
             )
             
-            # 4. Ordenar resultados
-            all_results.sort(key=lambda x: (
-                x.match.kickoff_time,
-                x.match.home_team,
-                x.market.value
-            ))
-            
             return all_results
             
         except Exception as e:
-            self.logger.error(f"Error en análisis completo: {e}")
+            self.logger.error("Error en análisis completo: %s", e)
             raise ValidationError(f"Error en análisis: {e}")
     
-    def _calculate_volatility(self, odds_list: List[float]) -> Optional[float]:
+    def _calculate_volatilities(self, odds_lists: List[List[float]]) -> List[Optional[float]]:
         """
-        Calcula la volatilidad (desviación estándar) de una lista de cuotas
+        Calcula la volatilidad (desviación estándar) de varios mercados a la vez
         
         Args:
-            odds_list: Lista de cuotas del mismo mercado de diferentes casas
+            odds_lists: Cuotas de cada mercado (una lista por mercado, de diferentes casas)
             
         Returns:
-            Desviación estándar en porcentaje (None si no hay suficientes datos)
+            Desviación estándar en porcentaje por mercado (None si no hay suficientes datos)
         """
-        if not odds_list or len(odds_list) < 2:
-            return None
+        if not odds_lists:
+            return []
         
-        try:
-            # Calcular promedio
-            mean = sum(odds_list) / len(odds_list)
-            
-            # Calcular varianza
-            variance = sum((x - mean) ** 2 for x in odds_list) / len(odds_list)
-            
-            # Calcular desviación estándar
-            std_dev = variance ** 0.5
-            
-            # Convertir a porcentaje relativo al promedio
-            volatility_pct = (std_dev / mean) * 100 if mean > 0 else 0
-            
-            return round(volatility_pct, 2)
-            
-        except Exception as e:
-            self.logger.warning(f"Error calculando volatilidad: {e}")
-            return None
+        # Una matriz por llamada (filas = mercados) en lugar de un cálculo por mercado
+        volatilities = batch_volatility(pad_odds(odds_lists))
+        return [None if np.isnan(v) else round(v, 2) for v in volatilities.tolist()]
     
     async def validate_api_connections(self) -> Dict[str, bool]:
         """
@@ -577,10 +615,10 @@ class FootballOddsAnalyzer:
         try:
             remaining = await self.odds_client.get_remaining_requests()
             status["the_odds_api"] = remaining > 0
-            self.logger.info(f"The Odds API: OK (requests restantes: {remaining})")
+            self.logger.info("The Odds API: OK (requests restantes: %s)", remaining)
         except Exception as e:
             status["the_odds_api"] = False
-            self.logger.error(f"The Odds API: ERROR - {e}")
+            self.logger.error("The Odds API: ERROR - %s", e)
             raise ValidationError("The Odds API no está disponible. No se puede continuar sin datos reales.")
         
         return status
@@ -592,9 +630,10 @@ class FootballOddsAnalyzer:
             remaining = await self.odds_client.get_remaining_requests()
             await self.odds_client.close()
             await self.bwin_client.close()
+            await self._http_client.aclose()
             
             self.logger.info("Conexiones cerradas correctamente")
             return remaining
         except Exception as e:
-            self.logger.error(f"Error cerrando conexiones: {e}")
+            self.logger.error("Error cerrando conexiones: %s", e)
             return None
\ No newline at end of file
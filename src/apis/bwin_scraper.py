@@ -1,10 +1,16 @@
-import asyncio
 import logging
-from typing import Optional, Dict
-from playwright.async_api import async_playwright, Page, TimeoutError as PlaywrightTimeout
+from typing import Optional, Dict, List
+from playwright.async_api import async_playwright, Page, ElementHandle, TimeoutError as PlaywrightTimeout
 import re
 
 
+# Primer número decimal del texto de un elemento de cuota (ej: "1.85")
+_ODDS_RE = re.compile(r'(\d+\.\d+)')
+
+# Espera por selector al probar una lista de selectores en orden de prioridad (ms)
+_SELECTOR_TIMEOUT = 2000
+
+
 class BwinScraper:
     """
     Scraper para obtener cuotas de Bwin mediante búsqueda en Google
@@ -58,8 +64,12 @@ class BwinScraper:
             bwin_url = "https://www.bwin.co/es/sports?popup=betfinder"
             await self.page.goto(bwin_url, wait_until='domcontentloaded', timeout=30000)
             
-            # Esperar a que cargue la página
-            await asyncio.sleep(3)
+            # Esperar a que la página termine de cargar (sin pausa fija)
+            try:
+                await self.page.wait_for_load_state("networkidle", timeout=15000)
+            except PlaywrightTimeout:
+                # Algunas páginas mantienen conexiones abiertas: continuar igualmente
+                pass
             
             # Buscar el cuadro de búsqueda (puede tener varios selectores posibles)
             search_selectors = [
@@ -70,15 +80,8 @@ class BwinScraper:
                 '#search-input'
             ]
             
-            search_box = None
-            for selector in search_selectors:
-                try:
-                    search_box = await self.page.wait_for_selector(selector, timeout=5000)
-                    if search_box:
-                        self.logger.info(f"Cuadro de búsqueda encontrado con selector: {selector}")
-                        break
-                except:
-                    continue
+            # Probar los selectores en orden de prioridad (el más específico primero)
+            search_box = await self._wait_for_first(search_selectors)
             
             if not search_box:
                 self.logger.error("No se encontró el cuadro de búsqueda")
@@ -86,7 +89,6 @@ class BwinScraper:
             
             # Buscar por el equipo local primero
             await search_box.fill(home_team)
-            await asyncio.sleep(2)
             
             # Buscar el elemento específico ds-list-item y hacer clic
             result_selectors = [
@@ -96,25 +98,29 @@ class BwinScraper:
                 '.ds-list-tile-title'
             ]
             
+            # URL de la búsqueda, para detectar cuándo el clic abre la página del partido
+            search_url = self.page.url
+            
             clicked = False
-            for selector in result_selectors:
-                try:
-                    # Esperar a que aparezcan resultados
-                    await self.page.wait_for_selector(selector, timeout=3000)
-                    # Hacer clic en el primer resultado
-                    await self.page.click(selector)
-                    clicked = True
-                    self.logger.info(f"Clic en resultado con selector: {selector}")
-                    break
-                except:
-                    continue
+            # Esperar a que aparezca un resultado y hacer clic en el primero
+            result = await self._wait_for_first(result_selectors)
+            if result:
+                await result.click()
+                clicked = True
+                self.logger.info("Clic en el primer resultado de búsqueda")
             
             if not clicked:
                 self.logger.warning(f"No se encontraron resultados para {home_team}")
                 return None
             
-            # Esperar a que carguen las cuotas
-            await asyncio.sleep(3)
+            # Esperar la navegación del clic: sin ella, el selector de cuotas
+            # puede resolverse sobre la página de búsqueda anterior
+            try:
+                await self.page.wait_for_url(lambda url: url != search_url, timeout=10000)
+                await self.page.wait_for_load_state("domcontentloaded")
+            except PlaywrightTimeout:
+                self.logger.warning(f"El resultado de búsqueda no abrió la página del partido para {home_team}")
+                return None
             
             # Intentar extraer las cuotas del partido
             # Buscar elementos con las cuotas (formato común: 1 X 2)
@@ -125,18 +131,29 @@ class BwinScraper:
                 '[data-odd-value]'
             ]
             
-            odds_elements = []
+            # Esperar a que aparezca cualquiera de los elementos de cuotas
+            try:
+                await self.page.wait_for_selector(", ".join(odds_selectors), timeout=10000)
+            except PlaywrightTimeout:
+                self.logger.warning("Las cuotas no aparecieron a tiempo")
+                return None
+            
+            # Leer el texto de los 3 primeros elementos en una sola llamada al navegador
+            odds_texts = []
             for selector in odds_selectors:
                 try:
-                    elements = await self.page.query_selector_all(selector)
-                    if len(elements) >= 3:
-                        odds_elements = elements
+                    texts = await self.page.evaluate(
+                        "(sel) => Array.from(document.querySelectorAll(sel)).slice(0, 3).map(e => e.innerText)",
+                        selector
+                    )
+                    if len(texts) >= 3:
+                        odds_texts = texts
                         self.logger.info(f"Cuotas encontradas con selector: {selector}")
                         break
                 except:
                     continue
             
-            if len(odds_elements) < 3:
+            if len(odds_texts) < 3:
                 self.logger.warning("No se encontraron suficientes elementos de cuotas")
                 return None
             
@@ -145,21 +162,16 @@ class BwinScraper:
             draw_odds = None
             away_odds = None
             
-            for i, elem in enumerate(odds_elements[:3]):
-                try:
-                    # Intentar obtener el valor de diferentes formas
-                    text = await elem.inner_text()
-                    odds_match = re.search(r'(\d+\.\d+)', text)
-                    if odds_match:
-                        value = float(odds_match.group(1))
-                        if i == 0:
-                            home_odds = value
-                        elif i == 1:
-                            draw_odds = value
-                        elif i == 2:
-                            away_odds = value
-                except:
-                    continue
+            for i, text in enumerate(odds_texts):
+                odds_match = _ODDS_RE.search(text or "")
+                if odds_match:
+                    value = float(odds_match.group(1))
+                    if i == 0:
+                        home_odds = value
+                    elif i == 1:
+                        draw_odds = value
+                    elif i == 2:
+                        away_odds = value
             
             if home_odds and draw_odds and away_odds:
                 self.logger.info(f"Cuotas encontradas: {home_odds} / {draw_odds} / {away_odds}")
@@ -179,6 +191,26 @@ class BwinScraper:
             self.logger.error(f"Error scraping Bwin: {e}")
             return None
     
+    async def _wait_for_first(self, selectors: List[str]) -> Optional[ElementHandle]:
+        """
+        Espera el primer selector visible respetando el orden de la lista
+        
+        Un selector CSS unido con comas resuelve en orden del DOM, no de prioridad,
+        así que cada selector se prueba por separado con una espera corta.
+        
+        Args:
+            selectors: Selectores CSS, del más al menos prioritario
+            
+        Returns:
+            Elemento encontrado o None si ninguno aparece
+        """
+        for selector in selectors:
+            try:
+                return await self.page.wait_for_selector(selector, state="visible", timeout=_SELECTOR_TIMEOUT)
+            except PlaywrightTimeout:
+                continue
+        return None
+    
     async def close(self):
         """Cierra el navegador"""
         try:
@@ -1,8 +1,11 @@
 import os
+import time
+import asyncio
 import logging
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timezone
 import httpx
+import orjson
 from ..models import (
     Match, OddsData, H2HOdds, BookmakerType, 
     MarketType, APIError
@@ -17,7 +20,9 @@ class OddsAPIIOClient:
     Documentación: https://docs.odds-api.io/
     """
     
-    def __init__(self):
+    EVENTS_TTL = 300  # Segundos que la lista de eventos (y su índice) se reutiliza
+    
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.api_key = os.getenv("ODDS_API_IO_KEY")
         self.enabled = bool(self.api_key and self.api_key != "your_api_key_here")
         
@@ -26,7 +31,46 @@ class OddsAPIIOClient:
         
         self.base_url = "https://api.odds-api.io/v3"
         self.logger = logging.getLogger(__name__)
-        self.client = httpx.AsyncClient(timeout=30.0)
+        # Permite compartir el pool de conexiones con otros clientes
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=300)
+        )
+        
+        # Eventos e índice compartidos entre partidos: (instante, eventos, índice)
+        self._events_cache: Optional[Tuple[float, List[Dict], Dict[Tuple[str, str], Optional[str]]]] = None
+        self._events_lock = asyncio.Lock()
+    
+    async def _get_events(self) -> Tuple[List[Dict], Dict[Tuple[str, str], Optional[str]]]:
+        """
+        Obtiene los eventos de fútbol y su índice por equipos, reutilizándolos durante EVENTS_TTL
+        
+        Returns:
+            Tupla (eventos, índice de _build_event_index)
+        """
+        # El lock evita que los partidos procesados en paralelo pidan la lista a la vez
+        async with self._events_lock:
+            if self._events_cache is not None:
+                fetched_at, events, index = self._events_cache
+                if time.monotonic() - fetched_at <= self.EVENTS_TTL:
+                    return events, index
+            
+            params = {
+                'apiKey': self.api_key,
+                'sport': 'football',
+                'limit': 100
+            }
+            
+            self.logger.info("Obteniendo eventos de Odds-API.io")
+            
+            response = await self.client.get(f"{self.base_url}/events", params=params)
+            response.raise_for_status()
+            
+            events = orjson.loads(response.content)
+            index = self._build_event_index(events)
+            self._events_cache = (time.monotonic(), events, index)
+            return events, index
     
     async def get_bwin_odds(self, match: Match) -> Tuple[List[OddsData], List[H2HOdds]]:
         """
@@ -43,28 +87,14 @@ class OddsAPIIOClient:
             return [], []
         
         try:
-            # Primero obtener eventos de football
-            events_url = f"{self.base_url}/events"
-            params = {
-                'apiKey': self.api_key,
-                'sport': 'football',
-                'limit': 100
-            }
-            
-            self.logger.info(f"Obteniendo eventos de Odds-API.io para buscar: {match.home_team} vs {match.away_team}")
-            
-            response = await self.client.get(events_url, params=params)
-            response.raise_for_status()
-            
-            events = response.json()
+            # Primero obtener eventos de football (compartidos entre partidos)
+            self.logger.info(f"Buscando evento en Odds-API.io: {match.home_team} vs {match.away_team}")
+            events, index = await self._get_events()
             
             # Buscar el evento que corresponde a nuestro partido
-            event_id = None
-            for event in events:
-                if self._match_teams(event, match.home_team, match.away_team):
-                    event_id = event.get('id')
-                    self.logger.info(f"Evento encontrado: ID {event_id}")
-                    break
+            event_id = self._find_event_id(events, match.home_team, match.away_team, index)
+            if event_id:
+                self.logger.info(f"Evento encontrado: ID {event_id}")
             
             if not event_id:
                 self.logger.warning(f"No se encontró evento para {match.home_team} vs {match.away_team}")
@@ -86,7 +116,7 @@ class OddsAPIIOClient:
             odds_data_list = []
             h2h_odds_list = []
             
-            odds_json = odds_response.json()
+            odds_json = orjson.loads(odds_response.content)
             
             # Log de bookmakers disponibles
             if 'bookmakers' in odds_json:
@@ -99,43 +129,50 @@ class OddsAPIIOClient:
             if 'bookmakers' in odds_json and 'Bwin' in odds_json['bookmakers']:
                 bwin_markets = odds_json['bookmakers']['Bwin']
                 
+                # Un único timestamp para todas las cuotas de esta respuesta
+                now = datetime.now(timezone.utc)
+                
                 # Buscar el mercado ML (1X2)
                 for market in bwin_markets:
                     if market.get('name') == 'ML' and 'odds' in market and len(market['odds']) > 0:
                         odds = market['odds'][0]
                         
-                        home_odds = float(odds.get('home', 0))
-                        draw_odds = float(odds.get('draw', 0))
-                        away_odds = float(odds.get('away', 0))
+                        # None si la cuota falta, no es numérica o no es mayor a 1.0
+                        home_odds = H2HOdds.parse_price(odds.get('home'))
+                        draw_odds = H2HOdds.parse_price(odds.get('draw'))
+                        away_odds = H2HOdds.parse_price(odds.get('away'))
                         
-                        if home_odds > 0 and draw_odds > 0 and away_odds > 0:
-                            # Crear H2HOdds con timestamp
-                            h2h_odds_obj = H2HOdds(
+                        if home_odds and draw_odds and away_odds:
+                            # Crear H2HOdds con timestamp (valores ya validados: sin validación)
+                            h2h_odds_obj = H2HOdds.model_construct(
                                 bookmaker=BookmakerType.BWIN,
                                 home_odds=home_odds,
                                 draw_odds=draw_odds,
                                 away_odds=away_odds,
-                                timestamp=datetime.now(timezone.utc)
+                                timestamp=now
                             )
                             h2h_odds_list.append(h2h_odds_obj)
                             
                             # Calcular cuotas de doble oportunidad
+                            # (la probabilidad del empate se usa en 1X y X2: calcularla una vez)
+                            inv_draw = 1.0 / draw_odds
+                            
                             # 1X = Local o Empate
-                            odds_1x = 1.0 / ((1.0 / home_odds) + (1.0 / draw_odds))
+                            odds_1x = 1.0 / ((1.0 / home_odds) + inv_draw)
                             odds_data_list.append(OddsData(
                                 bookmaker=BookmakerType.BWIN,
                                 market=MarketType.DOUBLE_CHANCE_1X,
                                 odds=round(odds_1x, 4),
-                                timestamp=datetime.now(timezone.utc)
+                                timestamp=now
                             ))
                             
                             # X2 = Empate o Visitante
-                            odds_x2 = 1.0 / ((1.0 / draw_odds) + (1.0 / away_odds))
+                            odds_x2 = 1.0 / (inv_draw + (1.0 / away_odds))
                             odds_data_list.append(OddsData(
                                 bookmaker=BookmakerType.BWIN,
                                 market=MarketType.DOUBLE_CHANCE_X2,
                                 odds=round(odds_x2, 4),
-                                timestamp=datetime.now(timezone.utc)
+                                timestamp=now
                             ))
                             
                             self.logger.info(f"Cuotas Bwin encontradas: 1={home_odds}, X={draw_odds}, 2={away_odds}")
@@ -158,6 +195,67 @@ class OddsAPIIOClient:
             self.logger.error(f"Error obteniendo cuotas de Bwin: {e}")
             return [], []
     
+    @staticmethod
+    def _normalize_team(name: str) -> str:
+        """Normaliza un nombre de equipo para compararlo (minúsculas, sin espacios extremos)"""
+        return name.strip().lower()
+    
+    @classmethod
+    def _build_event_index(cls, events: List[Dict]) -> Dict[Tuple[str, str], Optional[str]]:
+        """
+        Indexa los eventos por nombres de equipo normalizados (una pasada por payload)
+        
+        Args:
+            events: Eventos de la API
+            
+        Returns:
+            Diccionario {(local, visitante): ID del evento}; ante duplicados, el primero
+        """
+        index = {}
+        for event in events:
+            # "home"/"away" pueden llegar como null
+            key = (
+                cls._normalize_team(event.get('home') or ''),
+                cls._normalize_team(event.get('away') or '')
+            )
+            index.setdefault(key, event.get('id'))
+        return index
+    
+    def _find_event_id(
+        self,
+        events: List[Dict],
+        home_team: str,
+        away_team: str,
+        index: Optional[Dict[Tuple[str, str], Optional[str]]] = None
+    ) -> Optional[str]:
+        """
+        Busca el ID del evento que corresponde a un partido
+        
+        Args:
+            events: Eventos de la API
+            home_team: Nombre del equipo local
+            away_team: Nombre del equipo visitante
+            index: Índice de _build_event_index para estos eventos (se construye si falta)
+            
+        Returns:
+            ID del evento o None si no se encuentra
+        """
+        # Coincidencia exacta (normalizada) por diccionario; get_bwin_odds pasa el índice
+        # cacheado con los eventos, así que la pasada de construcción se hace una vez por TTL
+        if index is None:
+            index = self._build_event_index(events)
+        
+        event_id = index.get((self._normalize_team(home_team), self._normalize_team(away_team)))
+        if event_id:
+            return event_id
+        
+        # Sin coincidencia exacta: buscar por subcadena
+        for event in events:
+            if self._match_teams(event, home_team, away_team):
+                return event.get('id')
+        
+        return None
+    
     def _match_teams(self, event: Dict, home_team: str, away_team: str) -> bool:
         """
         Intenta emparejar un evento con los nombres de equipos
@@ -171,8 +269,12 @@ class OddsAPIIOClient:
             True si coincide, False en caso contrario
         """
         try:
-            event_home = event.get('home', '').lower()
-            event_away = event.get('away', '').lower()
+            event_home = (event.get('home') or '').lower()
+            event_away = (event.get('away') or '').lower()
+            
+            # Un nombre vacío o null "coincidiría" con cualquier equipo
+            if not event_home or not event_away:
+                return False
             
             home_match = home_team.lower() in event_home or event_home in home_team.lower()
             away_match = away_team.lower() in event_away or event_away in away_team.lower()
@@ -182,5 +284,6 @@ class OddsAPIIOClient:
             return False
     
     async def close(self):
-        """Cierra la conexión HTTP"""
-        await self.client.aclose()
+        """Cierra la conexión HTTP (solo si no es compartida)"""
+        if self._owns_client:
+            await self.client.aclose()
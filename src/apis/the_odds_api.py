@@ -1,13 +1,23 @@
 import os
+import time
+import functools
 import httpx
+import orjson
+from pydantic import ValidationError as PydanticValidationError
 import asyncio
 import logging
+from collections import OrderedDict
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timezone
-from tenacity import retry, stop_after_attempt, wait_exponential
 from ..models import Match, OddsData, MarketType, BookmakerType, APIError, H2HOdds
 
 
+@functools.lru_cache(maxsize=2048)
+def _parse_iso(timestamp: str) -> datetime:
+    """Convierte una fecha ISO de la API (con sufijo Z) a datetime; las casas suelen repetir la misma"""
+    return datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+
+
 class TheOddsAPIClient:
     """
     Cliente para The Odds API - Fuente oficial de cuotas deportivas
@@ -15,23 +25,186 @@ class TheOddsAPIClient:
     """
     
     BASE_URL = "https://api.the-odds-api.com/v4"
+    MAX_RETRIES = 3  # Reintentos ante respuestas 429 o errores de red
+    LEAGUE_CONCURRENCY = 6  # Ligas consultadas simultáneamente
+    CACHE_TTL = 300  # Segundos que una respuesta de cuotas se considera vigente
+    CACHE_MAXSIZE = 512  # Entradas máximas en caché (se descartan las menos usadas)
+    REMAINING_MAX_AGE = 60  # Segundos durante los que la quota conocida se considera vigente
+    
+    # Casas de apuestas permitidas (clave de The Odds API -> enum)
+    _BOOKMAKER_MAP = {
+        "betsson": BookmakerType.BETSSON,
+        "pinnacle": BookmakerType.PINNACLE,
+        "marathonbet": BookmakerType.MARATHONBET,
+        "codere_it": BookmakerType.CODERE_IT
+    }
+    
+    # Lista de ligas de fútbol disponibles en The Odds API (39 ligas activas)
+    SOCCER_LEAGUES = (
+        # Top 5 Ligas Europeas
+        ("soccer_epl", "EPL", "England"),
+        ("soccer_spain_la_liga", "La Liga", "Spain"),
+        ("soccer_germany_bundesliga", "Bundesliga", "Germany"),
+        ("soccer_italy_serie_a", "Serie A", "Italy"),
+        ("soccer_france_ligue_one", "Ligue 1", "France"),
+        
+        # Segunda División Europa
+        ("soccer_efl_champ", "Championship", "England"),
+        ("soccer_spain_segunda_division", "La Liga 2", "Spain"),
+        ("soccer_germany_bundesliga2", "Bundesliga 2", "Germany"),
+        ("soccer_italy_serie_b", "Serie B", "Italy"),
+        ("soccer_france_ligue_two", "Ligue 2", "France"),
+        
+        # Otras Ligas Europeas Principales
+        ("soccer_netherlands_eredivisie", "Eredivisie", "Netherlands"),
+        ("soccer_portugal_primeira_liga", "Primeira Liga", "Portugal"),
+        ("soccer_belgium_first_div", "Belgium First Div", "Belgium"),
+        ("soccer_turkey_super_league", "Super League", "Turkey"),
+        ("soccer_greece_super_league", "Super League", "Greece"),
+        ("soccer_austria_bundesliga", "Austrian Bundesliga", "Austria"),
+        ("soccer_switzerland_superleague", "Swiss Superleague", "Switzerland"),
+        ("soccer_denmark_superliga", "Superliga", "Denmark"),
+        ("soccer_sweden_allsvenskan", "Allsvenskan", "Sweden"),
+        ("soccer_norway_eliteserien", "Eliteserien", "Norway"),
+        ("soccer_poland_ekstraklasa", "Ekstraklasa", "Poland"),
+        ("soccer_spl", "Premiership", "Scotland"),
+        
+        # Ligas Inglesas Inferiores
+        ("soccer_england_league1", "League 1", "England"),
+        ("soccer_england_league2", "League 2", "England"),
+        ("soccer_germany_liga3", "3. Liga", "Germany"),
+        
+        # Competiciones Europeas
+        ("soccer_uefa_champs_league", "Champions League", "Europe"),
+        ("soccer_uefa_europa_league", "Europa League", "Europe"),
+        ("soccer_uefa_europa_conference_league", "Conference League", "Europe"),
+        
+        # América
+        ("soccer_brazil_campeonato", "Brasileirão", "Brazil"),
+        ("soccer_argentina_primera_division", "Primera División", "Argentina"),
+        ("soccer_chile_campeonato", "Primera División", "Chile"),
+        ("soccer_mexico_ligamx", "Liga MX", "Mexico"),
+        ("soccer_usa_mls", "MLS", "USA"),
+        ("soccer_conmebol_copa_libertadores", "Copa Libertadores", "South America"),
+        
+        # Asia y Oceanía
+        ("soccer_japan_j_league", "J League", "Japan"),
+        ("soccer_korea_kleague1", "K League 1", "South Korea"),
+        ("soccer_australia_aleague", "A-League", "Australia"),
+        
+        # Competiciones Internacionales
+        ("soccer_fifa_world_cup_qualifiers_europe", "World Cup Qualifiers EU", "Europe"),
+        ("soccer_fifa_world_cup_winner", "World Cup Winner", "World"),
+    )
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, client: Optional[httpx.AsyncClient] = None):
         self.api_key = api_key or os.getenv("THE_ODDS_API_KEY")
         if not self.api_key:
             raise ValueError("THE_ODDS_API_KEY es requerida")
         
-        self.client = httpx.AsyncClient(
-            timeout=30.0,
-            headers={"User-Agent": "FootballBettingAnalyzer/1.0"}
+        # Permite compartir el pool de conexiones con otros clientes
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            headers={"User-Agent": "FootballBettingAnalyzer/1.0"},
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=300)
         )
         
         self.logger = logging.getLogger(__name__)
+        
+        # Quota restante según la cabecera x-requests-remaining de la última respuesta
+        self.last_remaining: Optional[int] = None
+        self._last_remaining_at: Optional[float] = None
+        
+        # Caché LRU con expiración: clave -> (instante de guardado, valor)
+        # (una ejecución del CLI pide cada liga una sola vez; sirve al reutilizar el cliente)
+        self._cache: "OrderedDict[Tuple[str, ...], Tuple[float, Any]]" = OrderedDict()
+    
+    def _cache_get(self, key: Tuple[str, ...]) -> Optional[Any]:
+        """
+        Obtiene un valor de la caché si existe y no ha expirado
+        
+        Args:
+            key: Clave de la petición (prefijo del método, [mercado,] match_id, sport_key)
+            
+        Returns:
+            Valor guardado o None si no está o ha expirado
+        """
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.CACHE_TTL:
+            del self._cache[key]
+            return None
+        
+        self._cache.move_to_end(key)
+        return value
+    
+    def _cache_set(self, key: Tuple[str, ...], value: Any) -> None:
+        """
+        Guarda un valor en la caché descartando la entrada menos usada si está llena
+        
+        Args:
+            key: Clave de la petición (prefijo del método, [mercado,] match_id, sport_key)
+            value: Valor a guardar
+        """
+        self._cache[key] = (time.monotonic(), value)
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.CACHE_MAXSIZE:
+            self._cache.popitem(last=False)
+    
+    async def _get(self, url: str, params: Dict[str, Any]) -> httpx.Response:
+        """
+        Realiza un GET, reintenta ante rate limit (429) o errores de red y registra
+        la quota restante
+        
+        Args:
+            url: URL del endpoint
+            params: Parámetros de la consulta
+            
+        Returns:
+            Respuesta HTTP (sin verificar el código de estado)
+            
+        Raises:
+            httpx.TransportError: Si el error de red persiste tras MAX_RETRIES reintentos
+        """
+        for attempt in range(self.MAX_RETRIES + 1):
+            try:
+                response = await self.client.get(url, params=params)
+            except httpx.TransportError as e:
+                # Timeouts y fallos de conexión: reintentar con espera exponencial
+                if attempt == self.MAX_RETRIES:
+                    raise
+                delay = 2 ** attempt
+                self.logger.warning(f"Error de red ({type(e).__name__}), reintentando en {delay}s")
+                await asyncio.sleep(delay)
+                continue
+            
+            remaining = response.headers.get("x-requests-remaining")
+            if remaining is not None:
+                self.last_remaining = int(float(remaining))
+                self._last_remaining_at = time.monotonic()
+            
+            # 429 = demasiadas peticiones: reintentar con espera exponencial
+            if response.status_code != 429 or attempt == self.MAX_RETRIES:
+                return response
+            
+            # Quota agotada: reintentar solo gastaría tiempo
+            if remaining is not None and self.last_remaining == 0:
+                self.logger.warning("Quota de The Odds API agotada, no se reintenta")
+                return response
+            
+            # Respetar Retry-After si el servidor lo indica
+            retry_after = response.headers.get("retry-after")
+            try:
+                delay = float(retry_after) if retry_after is not None else 2 ** attempt
+            except ValueError:
+                delay = 2 ** attempt
+            self.logger.warning(f"Rate limit alcanzado (429), reintentando en {delay}s")
+            await asyncio.sleep(delay)
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
-    )
     async def get_football_matches(self, regions: str = "eu,us") -> List[Match]:
         """
         Obtiene partidos de fútbol de TODAS las ligas disponibles
@@ -44,105 +217,89 @@ class TheOddsAPIClient:
         """
         all_matches = []
         
-        # Lista de ligas de fútbol disponibles en The Odds API (39 ligas activas)
-        soccer_leagues = [
-            # Top 5 Ligas Europeas
-            ("soccer_epl", "EPL", "England"),
-            ("soccer_spain_la_liga", "La Liga", "Spain"),
-            ("soccer_germany_bundesliga", "Bundesliga", "Germany"),
-            ("soccer_italy_serie_a", "Serie A", "Italy"),
-            ("soccer_france_ligue_one", "Ligue 1", "France"),
-            
-            # Segunda División Europa
-            ("soccer_efl_champ", "Championship", "England"),
-            ("soccer_spain_segunda_division", "La Liga 2", "Spain"),
-            ("soccer_germany_bundesliga2", "Bundesliga 2", "Germany"),
-            ("soccer_italy_serie_b", "Serie B", "Italy"),
-            ("soccer_france_ligue_two", "Ligue 2", "France"),
-            
-            # Otras Ligas Europeas Principales
-            ("soccer_netherlands_eredivisie", "Eredivisie", "Netherlands"),
-            ("soccer_portugal_primeira_liga", "Primeira Liga", "Portugal"),
-            ("soccer_belgium_first_div", "Belgium First Div", "Belgium"),
-            ("soccer_turkey_super_league", "Super League", "Turkey"),
-            ("soccer_greece_super_league", "Super League", "Greece"),
-            ("soccer_austria_bundesliga", "Austrian Bundesliga", "Austria"),
-            ("soccer_switzerland_superleague", "Swiss Superleague", "Switzerland"),
-            ("soccer_denmark_superliga", "Superliga", "Denmark"),
-            ("soccer_sweden_allsvenskan", "Allsvenskan", "Sweden"),
-            ("soccer_norway_eliteserien", "Eliteserien", "Norway"),
-            ("soccer_poland_ekstraklasa", "Ekstraklasa", "Poland"),
-            ("soccer_spl", "Premiership", "Scotland"),
-            
-            # Ligas Inglesas Inferiores
-            ("soccer_england_league1", "League 1", "England"),
-            ("soccer_england_league2", "League 2", "England"),
-            ("soccer_germany_liga3", "3. Liga", "Germany"),
-            
-            # Competiciones Europeas
-            ("soccer_uefa_champs_league", "Champions League", "Europe"),
-            ("soccer_uefa_europa_league", "Europa League", "Europe"),
-            ("soccer_uefa_europa_conference_league", "Conference League", "Europe"),
-            
-            # América
-            ("soccer_brazil_campeonato", "Brasileirão", "Brazil"),
-            ("soccer_argentina_primera_division", "Primera División", "Argentina"),
-            ("soccer_chile_campeonato", "Primera División", "Chile"),
-            ("soccer_mexico_ligamx", "Liga MX", "Mexico"),
-            ("soccer_usa_mls", "MLS", "USA"),
-            ("soccer_conmebol_copa_libertadores", "Copa Libertadores", "South America"),
-            
-            # Asia y Oceanía
-            ("soccer_japan_j_league", "J League", "Japan"),
-            ("soccer_korea_kleague1", "K League 1", "South Korea"),
-            ("soccer_australia_aleague", "A-League", "Australia"),
-            
-            # Competiciones Internacionales
-            ("soccer_fifa_world_cup_qualifiers_europe", "World Cup Qualifiers EU", "Europe"),
-            ("soccer_fifa_world_cup_winner", "World Cup Winner", "World")
-        ]
+        # Consultar las ligas en paralelo, limitando las peticiones simultáneas:
+        # cada tarea procesa su liga en cuanto llega mientras las demás siguen en red
+        semaphore = asyncio.Semaphore(self.LEAGUE_CONCURRENCY)
+        async with asyncio.TaskGroup() as task_group:
+            tasks = [
+                task_group.create_task(
+                    self._fetch_league(sport_key, league_name, country, regions, semaphore)
+                )
+                for sport_key, league_name, country in self.SOCCER_LEAGUES
+            ]
         
-        for sport_key, league_name, country in soccer_leagues:
-            try:
-                url = f"{self.BASE_URL}/sports/{sport_key}/events"
-                params = {
-                    "apiKey": self.api_key,
-                    "regions": regions,
-                    "dateFormat": "iso"
-                }
-                
-                response = await self.client.get(url, params=params)
-                response.raise_for_status()
-                
-                data = response.json()
-                league_matches = []
+        for task in tasks:
+            all_matches.extend(task.result())
+        
+        self.logger.info(f"TOTAL: {len(all_matches)} partidos de todas las ligas")
+        return all_matches
+    
+    async def _fetch_league(
+        self,
+        sport_key: str,
+        league_name: str,
+        country: str,
+        regions: str,
+        semaphore: asyncio.Semaphore
+    ) -> List[Match]:
+        """
+        Obtiene los partidos de una liga
+        
+        Args:
+            sport_key: Clave de la liga en The Odds API
+            league_name: Nombre de la liga
+            country: País de la liga
+            regions: Regiones para obtener cuotas
+            semaphore: Semáforo que limita las peticiones simultáneas
+            
+        Returns:
+            Lista de partidos de la liga (vacía si la petición falla)
+        """
+        try:
+            url = f"{self.BASE_URL}/sports/{sport_key}/events"
+            params = {
+                "apiKey": self.api_key,
+                "regions": regions,
+                "dateFormat": "iso"
+            }
+            
+            async with semaphore:
+                response = await self._get(url, params)
+            response.raise_for_status()
+            
+            data = orjson.loads(response.content)
+            league_matches = []
+            
+            for event in data:
+                # Los eventos de apuestas a largo plazo (p. ej. *_winner) llegan sin
+                # equipos: se descartan en lugar de crear partidos con nombres nulos
+                home_team = event.get("home_team")
+                away_team = event.get("away_team")
+                if not home_team or not away_team:
+                    self.logger.debug(f"Evento {event.get('id')} de {league_name} sin equipos, se omite")
+                    continue
                 
-                for event in data:
+                try:
                     match = Match(
                         id=event["id"],
-                        home_team=event["home_team"],
-                        away_team=event["away_team"],
+                        home_team=home_team,
+                        away_team=away_team,
                         league=league_name,
                         country=country,
-                        kickoff_time=datetime.fromisoformat(
-                            event["commence_time"].replace("Z", "+00:00")
-                        ),
+                        kickoff_time=_parse_iso(event["commence_time"]),
                         sport_key=sport_key
                     )
-                    league_matches.append(match)
-                
-                all_matches.extend(league_matches)
-                self.logger.info(f"Obtenidos {len(league_matches)} partidos de {league_name}")
-                
-                # Pausa pequeña entre requests para respetar rate limits
-                await asyncio.sleep(0.2)
-                
-            except Exception as e:
-                self.logger.warning(f"No se pudieron obtener partidos de {league_name}: {e}")
-                continue
-        
-        self.logger.info(f"TOTAL: {len(all_matches)} partidos de todas las ligas")
-        return all_matches
+                except PydanticValidationError as e:
+                    self.logger.debug(f"Evento {event.get('id')} de {league_name} inválido, se omite: {e}")
+                    continue
+                league_matches.append(match)
+            
+            self.logger.info(f"Obtenidos {len(league_matches)} partidos de {league_name}")
+            return league_matches
+            
+        except Exception as e:
+            self.logger.warning(f"No se pudieron obtener partidos de {league_name}: {e}")
+            return []
     
     async def get_match_odds(self, match_id: str, sport_key: str = "soccer_epl") -> Tuple[List[OddsData], List[H2HOdds]]:
         """
@@ -155,6 +312,13 @@ class TheOddsAPIClient:
         Returns:
             Tupla con (lista de cuotas doble chance, lista de cuotas H2H para margen)
         """
+        cache_key = ("match_odds", match_id, sport_key)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            # Copias: el analizador agrega cuotas de Bwin sobre estas listas
+            self.logger.debug(f"Cuotas de match {match_id} obtenidas de caché")
+            return list(cached[0]), list(cached[1])
+        
         try:
             url = f"{self.BASE_URL}/sports/{sport_key}/events/{match_id}/odds"
             params = {
@@ -166,87 +330,13 @@ class TheOddsAPIClient:
                 "bookmakers": "betsson,pinnacle,marathonbet,codere_it"
             }
             
-            response = await self.client.get(url, params=params)
+            response = await self._get(url, params)
             response.raise_for_status()
             
-            data = response.json()
-            all_odds = []
-            h2h_odds = []
-            
-            # Procesar cuotas de cada bookmaker
-            for bookmaker_data in data.get("bookmakers", []):
-                bookmaker_name = bookmaker_data["key"]
-                
-                # Casas de apuestas permitidas
-                restricted_bookmakers = {
-                    "betsson": BookmakerType.BETSSON,
-                    "pinnacle": BookmakerType.PINNACLE,
-                    "marathonbet": BookmakerType.MARATHONBET,
-                    "codere_it": BookmakerType.CODERE_IT
-                }
-                
-                if bookmaker_name not in restricted_bookmakers:
-                    continue
-                
-                bookmaker_enum = restricted_bookmakers[bookmaker_name]
-                
-                for market_data in bookmaker_data.get("markets", []):
-                    if market_data["key"] != "h2h":
-                        continue
-                    
-                    outcomes = market_data["outcomes"]
-                    timestamp = datetime.fromisoformat(
-                        market_data["last_update"].replace("Z", "+00:00")
-                    )
-                    
-                    # Extraer cuotas para calcular doble oportunidad
-                    home_odds = next(
-                        (o["price"] for o in outcomes if o["name"] == data["home_team"]), 
-                        None
-                    )
-                    draw_odds = next(
-                        (o["price"] for o in outcomes if o["name"] == "Draw"), 
-                        None
-                    )
-                    away_odds = next(
-                        (o["price"] for o in outcomes if o["name"] == data["away_team"]), 
-                        None
-                    )
-                    
-                    # Guardar cuotas H2H para cálculo de margen
-                    if home_odds and draw_odds and away_odds:
-                        h2h_odds.append(H2HOdds(
-                            bookmaker=bookmaker_enum,
-                            home_odds=home_odds,
-                            draw_odds=draw_odds,
-                            away_odds=away_odds,
-                            timestamp=timestamp
-                        ))
-                    
-                    # Calcular cuotas de doble oportunidad
-                    if home_odds and draw_odds:
-                        # 1X = 1/(1/home + 1/draw)
-                        prob_1x = (1/home_odds) + (1/draw_odds)
-                        odds_1x = 1 / prob_1x
-                        
-                        all_odds.append(OddsData(
-                            bookmaker=bookmaker_enum,
-                            market=MarketType.DOUBLE_CHANCE_1X,
-                            odds=round(odds_1x, 2),
-                            timestamp=timestamp
-                        ))
-                    
-                    if draw_odds and away_odds:
-                        # X2 = 1/(1/draw + 1/away)
-                        prob_x2 = (1/draw_odds) + (1/away_odds)
-                        odds_x2 = 1 / prob_x2
-                        
-                        all_odds.append(OddsData(
-                            bookmaker=bookmaker_enum,
-                            market=MarketType.DOUBLE_CHANCE_X2,
-                            odds=round(odds_x2, 2),
-                            timestamp=timestamp
-                        ))
+            # orjson decodifica directamente los bytes de la respuesta (más rápido que json)
+            data = orjson.loads(response.content)
+            all_odds, h2h_odds = self._parse_h2h_event(data)
+            self._cache_set(cache_key, (tuple(all_odds), tuple(h2h_odds)))
             
             self.logger.info(f"Obtenidas {len(all_odds)} cuotas para match {match_id}")
             return all_odds, h2h_odds
@@ -264,6 +354,128 @@ class TheOddsAPIClient:
             self.logger.error(f"Error procesando cuotas: {e}")
             raise APIError(f"Error procesando cuotas: {e}")
     
+    def _parse_h2h_event(self, data: Dict[str, Any]) -> Tuple[List[OddsData], List[H2HOdds]]:
+        """
+        Convierte un evento con mercado h2h en cuotas de doble oportunidad y H2H
+        
+        Args:
+            data: Evento de The Odds API (con home_team, away_team y bookmakers)
+            
+        Returns:
+            Tupla con (lista de cuotas doble chance, lista de cuotas H2H para margen)
+        """
+        all_odds = []
+        h2h_odds = []
+        
+        # Procesar cuotas de cada bookmaker
+        for bookmaker_data in data.get("bookmakers", []):
+            bookmaker_enum = self._BOOKMAKER_MAP.get(bookmaker_data["key"])
+            if bookmaker_enum is None:
+                continue
+            
+            for market_data in bookmaker_data.get("markets", []):
+                if market_data["key"] != "h2h":
+                    continue
+                
+                outcomes = market_data["outcomes"]
+                timestamp = _parse_iso(market_data["last_update"])
+                
+                # Extraer cuotas para calcular doble oportunidad (una pasada por outcomes;
+                # reversed: ante nombres repetidos se conserva el primero, como con next())
+                # (parse_price descarta cuotas no numéricas o <= 1.0 antes de omitir la validación)
+                price_by_name = {o["name"]: o.get("price") for o in reversed(outcomes)}
+                home_odds = H2HOdds.parse_price(price_by_name.get(data["home_team"]))
+                draw_odds = H2HOdds.parse_price(price_by_name.get("Draw"))
+                away_odds = H2HOdds.parse_price(price_by_name.get(data["away_team"]))
+                
+                # Guardar cuotas H2H para cálculo de margen
+                # (model_construct: los valores ya están validados, se omite la validación)
+                if home_odds and draw_odds and away_odds:
+                    h2h_odds.append(H2HOdds.model_construct(
+                        bookmaker=bookmaker_enum,
+                        home_odds=home_odds,
+                        draw_odds=draw_odds,
+                        away_odds=away_odds,
+                        timestamp=timestamp
+                    ))
+                
+                # Calcular cuotas de doble oportunidad
+                # (la probabilidad del empate se usa en 1X y X2: calcularla una vez)
+                inv_draw = 1 / draw_odds if draw_odds else None
+                
+                if home_odds and draw_odds:
+                    # 1X = 1/(1/home + 1/draw)
+                    prob_1x = (1/home_odds) + inv_draw
+                    odds_1x = 1 / prob_1x
+                    
+                    all_odds.append(OddsData(
+                        bookmaker=bookmaker_enum,
+                        market=MarketType.DOUBLE_CHANCE_1X,
+                        odds=round(odds_1x, 2),
+                        timestamp=timestamp
+                    ))
+                
+                if draw_odds and away_odds:
+                    # X2 = 1/(1/draw + 1/away)
+                    prob_x2 = inv_draw + (1/away_odds)
+                    odds_x2 = 1 / prob_x2
+                    
+                    all_odds.append(OddsData(
+                        bookmaker=bookmaker_enum,
+                        market=MarketType.DOUBLE_CHANCE_X2,
+                        odds=round(odds_x2, 2),
+                        timestamp=timestamp
+                    ))
+        
+        return all_odds, h2h_odds
+    
+    async def get_odds_bulk(self, sport_key: str) -> Optional[Dict[str, Tuple[List[OddsData], List[H2HOdds]]]]:
+        """
+        Obtiene cuotas h2h de TODOS los partidos de una liga en una sola llamada
+        
+        Args:
+            sport_key: Clave de la liga/deporte (ej: soccer_epl, soccer_spain_la_liga)
+            
+        Returns:
+            Diccionario {match_id: (cuotas doble chance, cuotas H2H)} o None si la llamada falla
+        """
+        cache_key = ("bulk", sport_key)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            # Copias: el analizador agrega cuotas de Bwin sobre estas listas
+            self.logger.debug(f"Cuotas de {sport_key} obtenidas de caché")
+            return {match_id: (list(odds), list(h2h)) for match_id, (odds, h2h) in cached.items()}
+        
+        try:
+            url = f"{self.BASE_URL}/sports/{sport_key}/odds"
+            params = {
+                "apiKey": self.api_key,
+                "regions": "eu,us,uk,au",
+                "markets": "h2h",  # Head to head (1X2)
+                "oddsFormat": "decimal",
+                "dateFormat": "iso",
+                "bookmakers": "betsson,pinnacle,marathonbet,codere_it"
+            }
+            
+            response = await self._get(url, params)
+            response.raise_for_status()
+            
+            events = orjson.loads(response.content)
+            odds_by_match = {event["id"]: self._parse_h2h_event(event) for event in events}
+            self._cache_set(cache_key, {
+                match_id: (tuple(odds), tuple(h2h)) for match_id, (odds, h2h) in odds_by_match.items()
+            })
+            
+            self.logger.info(f"Obtenidas cuotas de {len(odds_by_match)} partidos de {sport_key} en una sola llamada")
+            return odds_by_match
+            
+        except httpx.HTTPStatusError as e:
+            self.logger.warning(f"Error HTTP {e.response.status_code} obteniendo cuotas de {sport_key}")
+            return None
+        except Exception as e:
+            self.logger.warning(f"Error procesando cuotas de {sport_key}: {e}")
+            return None
+    
     async def get_market_odds(self, match_id: str, sport_key: str, market: str) -> List[Dict[str, Any]]:
         """
         Obtiene cuotas para un mercado específico (totals, btts, h2h_q1)
@@ -276,6 +488,12 @@ class TheOddsAPIClient:
         Returns:
             Lista de datos de cuotas del mercado
         """
+        cache_key = ("market", market, match_id, sport_key)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            self.logger.debug(f"Cuotas de {market} para match {match_id} obtenidas de caché")
+            return list(cached)
+        
         try:
             url = f"{self.BASE_URL}/sports/{sport_key}/events/{match_id}/odds"
             
@@ -288,34 +506,21 @@ class TheOddsAPIClient:
                 "bookmakers": "betsson,pinnacle,marathonbet,codere_it"
             }
             
-            response = await self.client.get(url, params=params)
+            response = await self._get(url, params)
             response.raise_for_status()
             
-            data = response.json()
+            data = orjson.loads(response.content)
             odds_list = []
             
-            # Mapeo de las 4 casas principales
-            restricted_bookmakers = {
-                "betsson": BookmakerType.BETSSON,
-                "pinnacle": BookmakerType.PINNACLE,
-                "marathonbet": BookmakerType.MARATHONBET,
-                "codere_it": BookmakerType.CODERE_IT
-            }
-            
             # Procesar cuotas de cada bookmaker
             for bookmaker_data in data.get("bookmakers", []):
-                bookmaker_name = bookmaker_data["key"]
-                
-                # Solo procesar las 6 casas permitidas
-                if bookmaker_name not in restricted_bookmakers:
+                # Solo procesar las casas permitidas
+                bookmaker_enum = self._BOOKMAKER_MAP.get(bookmaker_data["key"])
+                if bookmaker_enum is None:
                     continue
                 
-                bookmaker_enum = restricted_bookmakers[bookmaker_name]
-                
                 for market_data in bookmaker_data.get("markets", []):
-                    timestamp = datetime.fromisoformat(
-                        market_data["last_update"].replace("Z", "+00:00")
-                    )
+                    timestamp = _parse_iso(market_data["last_update"])
                     
                     for outcome in market_data.get("outcomes", []):
                         odds_info = {
@@ -327,6 +532,8 @@ class TheOddsAPIClient:
                         }
                         odds_list.append(odds_info)
             
+            self._cache_set(cache_key, tuple(odds_list))
+            
             self.logger.info(f"Obtenidas {len(odds_list)} cuotas de {market} para match {match_id}")
             return odds_list
             
@@ -343,11 +550,16 @@ class TheOddsAPIClient:
     
     async def get_remaining_requests(self) -> int:
         """Obtiene el número de requests restantes en tu quota"""
+        # Reutilizar la quota de la última respuesta si es reciente (evita una llamada extra)
+        if (self._last_remaining_at is not None
+                and time.monotonic() - self._last_remaining_at <= self.REMAINING_MAX_AGE):
+            return self.last_remaining
+        
         try:
             url = f"{self.BASE_URL}/sports"
             params = {"apiKey": self.api_key}
             
-            response = await self.client.get(url, params=params)
+            response = await self._get(url, params)
             response.raise_for_status()
             
             remaining = int(response.headers.get("x-requests-remaining", 0))
@@ -359,5 +571,6 @@ class TheOddsAPIClient:
             return 0
     
     async def close(self):
-        """Cierra el cliente HTTP"""
-        await self.client.aclose()
\ No newline at end of file
+        """Cierra el cliente HTTP (solo si no es compartido)"""
+        if self._owns_client:
+            await self.client.aclose()
\ No newline at end of file
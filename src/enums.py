@@ -0,0 +1,79 @@
+"""
+Enumeraciones de mercados y casas de apuestas
+
+Módulo sin dependencias externas: los scripts que solo necesitan los enums
+pueden importarlo sin cargar pydantic.
+"""
+
+from typing import Dict
+from enum import Enum
+
+
+class MarketType(str, Enum):
+    """Tipos de mercados de apuestas"""
+    DOUBLE_CHANCE_1X = "1X"
+    DOUBLE_CHANCE_X2 = "X2"
+    MATCH_WINNER_1 = "1"
+    MATCH_WINNER_X = "X"
+    MATCH_WINNER_2 = "2"
+    # Nuevos mercados fusionados de live_markets
+    TOTALS = "totals"  # Over/Under goles
+    BTTS = "btts"  # Both Teams To Score
+    H2H_Q1 = "h2h_q1"  # 1X2 primer tiempo
+
+
+class BookmakerType(str, Enum):
+    """Casas de apuestas soportadas - expandido para incluir todas las disponibles en The Odds API"""
+    # Principales europeas
+    PINNACLE = "pinnacle"
+    BET365 = "bet365"
+    BETFAIR = "betfair"
+    BETFAIR_EX_EU = "betfair_ex_eu"
+    BETFAIR_EX_UK = "betfair_ex_uk"
+    BETFAIR_EX_AU = "betfair_ex_au"
+    UNIBET = "unibet"
+    UNIBET_UK = "unibet_uk"
+    UNIBET_NL = "unibet_nl"
+    UNIBET_SE = "unibet_se"
+    WILLIAM_HILL = "williamhill"
+    BETSSON = "betsson"
+    MARATHONBET = "marathonbet"
+    BWIN = "bwin"
+    LADBROKES = "ladbrokes"
+    LADBROKES_UK = "ladbrokes_uk"
+    CORAL = "coral"
+    BETCLIC = "betclic_fr"
+    BETVICTOR = "betvictor"
+    BETWAY = "betway"
+    CASUMO = "casumo"
+    COOLBET = "coolbet"
+    GROSVENOR = "grosvenor"
+    LEOVEGAS = "leovegas"
+    LEOVEGAS_SE = "leovegas_se"
+    NORDICBET = "nordicbet"
+    PADDYPOWER = "paddypower"
+    SKYBET = "skybet"
+    SMARKETS = "smarkets"
+    SPORT888 = "sport888"
+    TIPICO = "tipico_de"
+    VIRGINBET = "virginbet"
+    WINAMAX = "winamax_fr"
+    WINAMAX_DE = "winamax_de"
+    CODERE_IT = "codere_it"
+    
+    # Americanas
+    BETMGM = "betmgm"
+    BOVADA = "bovada"
+    DRAFTKINGS = "draftkings"
+    FANDUEL = "fanduel"
+    MYBOOKIE = "mybookieag"
+    
+    # Australianas
+    TAB = "tab"
+    TABTOUCH = "tabtouch"
+    POINTSBET = "pointsbetau"
+
+
+# Posición de cada enum: permite contar por casa/mercado en listas en lugar de dicts
+BOOKMAKER_INDEX: Dict[BookmakerType, int] = {b: i for i, b in enumerate(BookmakerType)}
+MARKET_INDEX: Dict[MarketType, int] = {m: i for i, m in enumerate(MarketType)}
@@ -0,0 +1,3 @@
+"""
+Cálculos numéricos vectorizados sobre cuotas
+"""
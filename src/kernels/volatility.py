@@ -0,0 +1,57 @@
+"""
+Volatilidad de cuotas calculada en bloque para varios mercados a la vez
+"""
+
+from typing import Sequence
+
+import numpy as np
+
+
+def pad_odds(odds_lists: Sequence[Sequence[float]]) -> np.ndarray:
+    """
+    Agrupa listas de cuotas de distinta longitud en una matriz rellenada con NaN
+    
+    Args:
+        odds_lists: Cuotas de cada mercado (una lista por mercado)
+        
+    Returns:
+        Matriz float64 (filas = mercados, columnas = casas de apuestas)
+    """
+    width = max((len(odds) for odds in odds_lists), default=0)
+    odds_2d = np.full((len(odds_lists), width), np.nan, dtype=np.float64)
+    for row, odds in enumerate(odds_lists):
+        odds_2d[row, :len(odds)] = odds
+    return odds_2d
+
+
+def batch_volatility(odds_2d: np.ndarray) -> np.ndarray:
+    """
+    Calcula la volatilidad (desviación estándar relativa) de cada fila de cuotas
+    
+    Args:
+        odds_2d: Matriz de cuotas (filas = mercados, NaN = cuota ausente)
+        
+    Returns:
+        Volatilidad en porcentaje por fila (NaN si la fila tiene menos de 2 cuotas)
+    """
+    rows = odds_2d.shape[0]
+    counts = np.zeros(rows)
+    mean = np.zeros(rows)
+    m2 = np.zeros(rows)
+    
+    # Algoritmo de Welford: una sola pasada por columna (casa de apuestas),
+    # vectorizada sobre todos los mercados y estable aunque las cuotas casi coincidan
+    for column in odds_2d.T:
+        present = ~np.isnan(column)
+        counts += present
+        delta = np.where(present, column - mean, 0.0)
+        mean += np.divide(delta, counts, out=np.zeros(rows), where=present)
+        m2 += np.where(present, (column - mean) * delta, 0.0)
+    
+    # Desviación estándar poblacional relativa a la media
+    with np.errstate(invalid="ignore", divide="ignore"):
+        volatility = np.sqrt(m2 / counts) / mean * 100
+    
+    volatility[mean <= 0] = 0.0
+    volatility[counts < 2] = np.nan
+    return volatility
@@ -1,72 +1,8 @@
-from typing import Dict, List, Optional
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
 from pydantic import BaseModel, Field
 from datetime import datetime
-from enum import Enum
-
-
-class MarketType(str, Enum):
-    """Tipos de mercados de apuestas"""
-    DOUBLE_CHANCE_1X = "1X"
-    DOUBLE_CHANCE_X2 = "X2"
-    MATCH_WINNER_1 = "1"
-    MATCH_WINNER_X = "X"
-    MATCH_WINNER_2 = "2"
-    # Nuevos mercados fusionados de live_markets
-    TOTALS = "totals"  # Over/Under goles
-    BTTS = "btts"  # Both Teams To Score
-    H2H_Q1 = "h2h_q1"  # 1X2 primer tiempo
-
-
-class BookmakerType(str, Enum):
-    """Casas de apuestas soportadas - expandido para incluir todas las disponibles en The Odds API"""
-    # Principales europeas
-    PINNACLE = "pinnacle"
-    BET365 = "bet365"
-    BETFAIR = "betfair"
-    BETFAIR_EX_EU = "betfair_ex_eu"
-    BETFAIR_EX_UK = "betfair_ex_uk"
-    BETFAIR_EX_AU = "betfair_ex_au"
-    UNIBET = "unibet"
-    UNIBET_UK = "unibet_uk"
-    UNIBET_NL = "unibet_nl"
-    UNIBET_SE = "unibet_se"
-    WILLIAM_HILL = "williamhill"
-    BETSSON = "betsson"
-    MARATHONBET = "marathonbet"
-    BWIN = "bwin"
-    LADBROKES = "ladbrokes"
-    LADBROKES_UK = "ladbrokes_uk"
-    CORAL = "coral"
-    BETCLIC = "betclic_fr"
-    BETVICTOR = "betvictor"
-    BETWAY = "betway"
-    CASUMO = "casumo"
-    COOLBET = "coolbet"
-    GROSVENOR = "grosvenor"
-    LEOVEGAS = "leovegas"
-    LEOVEGAS_SE = "leovegas_se"
-    NORDICBET = "nordicbet"
-    PADDYPOWER = "paddypower"
-    SKYBET = "skybet"
-    SMARKETS = "smarkets"
-    SPORT888 = "sport888"
-    TIPICO = "tipico_de"
-    VIRGINBET = "virginbet"
-    WINAMAX = "winamax_fr"
-    WINAMAX_DE = "winamax_de"
-    CODERE_IT = "codere_it"
-    
-    # Americanas
-    BETMGM = "betmgm"
-    BOVADA = "bovada"
-    DRAFTKINGS = "draftkings"
-    FANDUEL = "fanduel"
-    MYBOOKIE = "mybookieag"
-    
-    # Australianas
-    TAB = "tab"
-    TABTOUCH = "tabtouch"
-    POINTSBET = "pointsbetau"
+from .enums import MarketType, BookmakerType
 
 
 class Match(BaseModel):
@@ -104,12 +40,30 @@ class H2HOdds(BaseModel):
     away_odds: float
     timestamp: datetime
     
-    @property
+    @staticmethod
+    def parse_price(value) -> Optional[float]:
+        """
+        Convierte una cuota recibida de una API antes de usar model_construct
+        
+        Args:
+            value: Valor crudo de la cuota (número o texto)
+            
+        Returns:
+            La cuota como float, o None si no es numérica o no es mayor a 1.0
+        """
+        try:
+            price = float(value)
+        except (TypeError, ValueError):
+            return None
+        return price if price > 1.0 else None
+    
+    # Las cuotas no cambian tras la construcción: calcular el margen una sola vez
+    @cached_property
     def overround(self) -> float:
         """Calcula el margen/overround de la casa de apuestas"""
         return (1/self.home_odds + 1/self.draw_odds + 1/self.away_odds) - 1.0
     
-    @property
+    @cached_property
     def overround_percentage(self) -> float:
         """Retorna el margen como porcentaje"""
         return self.overround * 100
@@ -122,47 +76,77 @@ class MatchOdds(BaseModel):
     odds_x2: List[OddsData] = []
     odds_h2h: List[H2HOdds] = []  # Cuotas H2H para cálculo de margen
     
+    # Los agregados se calculan una sola vez por instancia (las listas no se modifican
+    # después de construir el objeto)
+    
+    @staticmethod
+    def _summarize(odds_list: List[OddsData]) -> Tuple[Optional[OddsData], float]:
+        """Obtiene la mejor cuota y el promedio de una lista en una sola pasada"""
+        if not odds_list:
+            return None, 0.0
+        best = odds_list[0]
+        total = 0.0
+        for odd in odds_list:
+            if odd.odds > best.odds:
+                best = odd
+            total += odd.odds
+        return best, total / len(odds_list)
+    
+    @cached_property
+    def _summary_1x(self) -> Tuple[Optional[OddsData], float]:
+        return self._summarize(self.odds_1x)
+    
+    @cached_property
+    def _summary_x2(self) -> Tuple[Optional[OddsData], float]:
+        return self._summarize(self.odds_x2)
+    
+    @cached_property
+    def _summary_h2h(self) -> Tuple[Optional[H2HOdds], float]:
+        """Obtiene la casa con menor margen y el margen promedio en una sola pasada"""
+        if not self.odds_h2h:
+            return None, 0.0
+        best = self.odds_h2h[0]
+        total = 0.0
+        for h in self.odds_h2h:
+            if h.overround < best.overround:
+                best = h
+            total += h.overround_percentage
+        return best, total / len(self.odds_h2h)
+    
     @property
     def best_1x_odds(self) -> Optional[OddsData]:
         """Obtiene la mejor cuota para 1X"""
-        if not self.odds_1x:
-            return None
-        return max(self.odds_1x, key=lambda x: x.odds)
+        return self._summary_1x[0]
     
     @property
     def best_x2_odds(self) -> Optional[OddsData]:
         """Obtiene la mejor cuota para X2"""
-        if not self.odds_x2:
-            return None
-        return max(self.odds_x2, key=lambda x: x.odds)
+        return self._summary_x2[0]
     
     @property
     def avg_1x_odds(self) -> float:
         """Calcula el promedio de cuotas para 1X"""
-        if not self.odds_1x:
-            return 0.0
-        return sum(odd.odds for odd in self.odds_1x) / len(self.odds_1x)
+        return self._summary_1x[1]
     
     @property
     def avg_x2_odds(self) -> float:
         """Calcula el promedio de cuotas para X2"""
-        if not self.odds_x2:
-            return 0.0
-        return sum(odd.odds for odd in self.odds_x2) / len(self.odds_x2)
+        return self._summary_x2[1]
     
     @property
     def best_overround(self) -> Optional[H2HOdds]:
         """Obtiene el bookmaker con el menor margen (mejor para apostador)"""
-        if not self.odds_h2h:
-            return None
-        return min(self.odds_h2h, key=lambda x: x.overround)
+        return self._summary_h2h[0]
     
     @property
     def avg_overround_percentage(self) -> float:
         """Calcula el margen promedio de todas las casas"""
-        if not self.odds_h2h:
-            return 0.0
-        return sum(h.overround_percentage for h in self.odds_h2h) / len(self.odds_h2h)
+        return self._summary_h2h[1]
+    
+    @cached_property
+    def h2h_by_bookmaker(self) -> Dict[BookmakerType, H2HOdds]:
+        """Cuotas H2H indexadas por bookmaker (ante duplicados se conserva la primera)"""
+        return {h.bookmaker: h for h in reversed(self.odds_h2h)}
 
 
 class AnalysisResult(BaseModel):
@@ -1,12 +1,245 @@
 import logging
-from typing import List, Dict, Any, Tuple, Optional
-from datetime import datetime, timedelta
-from tabulate import tabulate
-from .models import AnalysisResult, MarketType
+from collections import Counter
+from operator import attrgetter, itemgetter
+from typing import List, Dict, Any, Tuple, Optional, Iterator, Callable, Sequence, TextIO
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from .models import AnalysisResult
+from .enums import MarketType, BookmakerType, BOOKMAKER_INDEX, MARKET_INDEX
 import os
+import io
 import csv
+import unicodedata
 from pathlib import Path
-import pytz
+
+
+# Hora de Colombia: UTC-5 fijo (sin horario de verano), la conversión es una suma
+_BOGOTA_TZ = timezone(timedelta(hours=-5), "America/Bogota")
+
+# Tipo de mercado legible para el CSV combinado
+_MARKET_TYPE_MAP = {
+    MarketType.DOUBLE_CHANCE_1X: "Doble Chance",
+    MarketType.DOUBLE_CHANCE_X2: "Doble Chance",
+    MarketType.TOTALS: "Goles (Over/Under)",
+    MarketType.BTTS: "Ambos Marcan",
+    MarketType.H2H_Q1: "1X2 Primer Tiempo"
+}
+
+# Código y nombre corto de doble chance por mercado (el resto cae en "X2", como antes)
+_MARKET_CODE = {
+    MarketType.DOUBLE_CHANCE_1X: "1X",
+    MarketType.DOUBLE_CHANCE_X2: "X2"
+}
+_MARKET_DISPLAY = {
+    MarketType.DOUBLE_CHANCE_1X: "1X (Local/Empate)",
+    MarketType.DOUBLE_CHANCE_X2: "X2 (Empate/Visitante)"
+}
+
+# Buffer de escritura para los CSV en disco (1 MB)
+_CSV_WRITE_BUFFER = 1 << 20
+
+# Headers del CSV combinado
+_COMBINED_CSV_HEADERS = (
+    "Partido",
+    "Fecha_Hora_Colombia",
+    "Liga",
+    "Tipo_Mercado",
+    "Mercado",
+    "Mejor_Cuota",
+    "Mejor_Casa",
+    "Num_Casas",
+    "Score_Final",
+    "Diferencia_Cuota_Promedio",
+    "Volatilidad_Pct",
+    "Margen_Casa_Pct",
+    "Cuota_Promedio_Mercado",
+    "Todas_Las_Cuotas"
+)
+
+# Headers del CSV de ranking
+_RANKING_CSV_HEADERS = (
+    "Rank",
+    "Partido",
+    "Mercado",
+    "Cuota",
+    "Casa_Apuestas",
+    "Margen_Casa_Pct",
+    "Margen_Mercado_Promedio_Pct",
+    "Ventaja_Margen_Pct",
+    "Cuota_Premium",
+    "Value_Score_Pct",
+    "Inverso_Margen_Casa",
+    "Score_Final",
+    "Fecha_Hora_COT",
+    "Liga"
+)
+
+# Headers de la tabla de análisis
+_ANALYSIS_TABLE_HEADERS = (
+    "Partido",
+    "Mercado Analizado",
+    "Cuota Más Alta",
+    "Casa de Apuestas",
+    "Margen Casa (%)",
+    "¿Cumple Criterios?",
+    "Fecha/Hora",
+    "Liga"
+)
+_ANALYSIS_TABLE_ALIGN = ("<", "<", "^", "<", "<", "<", "<", "<")
+
+# Headers de la tabla de cumplimiento
+_COMPLIANCE_TABLE_HEADERS = ("Partido", "Mercado", "Cuota", "Bookmaker", "Margen", "Hora")
+_COMPLIANCE_TABLE_ALIGN = ("<", "<", ">", "<", "<", "<")
+
+# Plantilla del reporte de análisis (se rellena con str.format_map)
+_ANALYSIS_REPORT_TEMPLATE = """📊 **ANÁLISIS VERÍDICO DE CUOTAS DE FÚTBOL**
+🔗 **Fuente**: The Odds API (datos 100% reales y oficiales)
+⚡ **Sin Scraping**: Solo datos autorizados y verificados
+✅ **Sin Simulación**: Todos los datos son reales de bookmakers activos
+📅 **Generado**: {generated_at}
+
+📈 **RESUMEN EJECUTIVO**
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+• Total de mercados analizados: {total_markets}
+• Mercados que cumplen criterios: {meets_criteria_count}
+• Tasa de cumplimiento: {compliance_rate:.1f}%
+• Criterios aplicados: Prob. ≥ {min_prob:.0%}, Cuota ≥ {min_odds}
+
+📋 **TABLA DETALLADA**
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+{table}
+
+🔍 **VALIDACIÓN DE DATOS**
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+✅ Cuotas obtenidas de The Odds API en tiempo real
+✅ Filtrado automático por criterios establecidos
+✅ Sin manipulación ni simulación - 100% datos reales de bookmakers
+
+💡 **INTERPRETACIÓN**
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+• 1X: Gana equipo local O empate
+• X2: Empate O gana equipo visitante
+• Margen Casa: Ganancia garantizada de la casa (menor = mejor para apostador)
+• Score_Final: Cuota + (Ventaja_Margen / Margen_Casa) - Mayor score = mejor oportunidad
+• Criterios: Filtros para identificar oportunidades
+"""
+
+
+def _blank_if_none(value: Any) -> Any:
+    """
+    Valor para una celda CSV: vacío solo si falta (0.0 es un valor válido)
+    
+    Args:
+        value: Valor opcional
+        
+    Returns:
+        El valor o "" si es None
+    """
+    return "" if value is None else value
+
+
+def _sort_by_score(
+    results: List[AnalysisResult],
+    score_of: Callable[[AnalysisResult], Optional[float]]
+) -> List[AnalysisResult]:
+    """
+    Ordena por score descendente dejando al final, en su orden original,
+    los resultados sin score
+    
+    Args:
+        results: Resultados a ordenar
+        score_of: Función que devuelve el score de un resultado (o None)
+        
+    Returns:
+        Lista ordenada
+    """
+    scored = []
+    unscored = []
+    for result in results:
+        score = score_of(result)
+        if score is None:
+            unscored.append(result)
+        else:
+            scored.append((score, result))
+    
+    scored.sort(key=itemgetter(0), reverse=True)
+    return [result for _, result in scored] + unscored
+
+
+def _display_width(text: str) -> int:
+    """
+    Ancho en columnas de terminal de un texto (emojis y caracteres anchos ocupan 2)
+    
+    Args:
+        text: Texto a medir
+        
+    Returns:
+        Número de columnas que ocupa
+    """
+    if text.isascii():
+        return len(text)
+    width = 0
+    for char in text:
+        if unicodedata.combining(char):
+            continue
+        width += 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+    return width
+
+
+def _format_grid(
+    rows: List[List[str]],
+    headers: Sequence[str],
+    align: Optional[Sequence[str]] = None
+) -> str:
+    """
+    Formatea una tabla en estilo grid (mismo aspecto que tabulate "grid")
+    
+    Args:
+        rows: Filas con las celdas ya formateadas como texto
+        headers: Encabezados de las columnas
+        align: Alineación por columna ("<", "^" o ">"); por defecto a la izquierda
+        
+    Returns:
+        Tabla formateada como string
+    """
+    if align is None:
+        align = ("<",) * len(headers)
+    
+    # Una pasada para los anchos (los encabezados llevan 2 espacios mínimos de margen)
+    widths = [_display_width(h) + 2 for h in headers]
+    for row in rows:
+        for i, cell in enumerate(row):
+            cell_width = _display_width(cell)
+            if cell_width > widths[i]:
+                widths[i] = cell_width
+    
+    def pad(cell: str, a: str, width: int) -> str:
+        fill = width - _display_width(cell)
+        if a == ">":
+            return " " * fill + cell
+        if a == "^":
+            left = fill // 2
+            return " " * left + cell + " " * (fill - left)
+        return cell + " " * fill
+    
+    def format_line(cells: Sequence[str]) -> str:
+        return "| " + " | ".join(
+            pad(cell, a, w) for cell, a, w in zip(cells, align, widths)
+        ) + " |"
+    
+    separator = "+" + "+".join("-" * (w + 2) for w in widths) + "+"
+    header_separator = "+" + "+".join("=" * (w + 2) for w in widths) + "+"
+    
+    lines = [separator, format_line(headers), header_separator]
+    for row in rows:
+        lines.append(format_line(row))
+        lines.append(separator)
+    if not rows:
+        # Tabla vacía: encabezado, separador "=" y regla de cierre (igual que tabulate)
+        lines.append(separator)
+    
+    return "\n".join(lines)
 
 
 class ReportGenerator:
@@ -17,15 +250,22 @@ class ReportGenerator:
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.timezone = pytz.timezone("America/Bogota")
+        self.timezone = _BOGOTA_TZ
     
-    def generate_combined_csv(self, results: List[AnalysisResult], output_dir: str = ".") -> str:
+    def generate_combined_csv(
+        self,
+        results: List[AnalysisResult],
+        output_dir: str = ".",
+        now: Optional[datetime] = None
+    ) -> str:
         """
         Genera UN SOLO CSV combinando todos los mercados (1X, X2, TOTALS, BTTS, H2H_Q1)
         
         Args:
             results: Lista de resultados de todos los mercados
             output_dir: Directorio donde guardar el CSV
+            now: Momento de generación; pasarlo desde el llamador permite
+                compartir el mismo timestamp entre varios reportes
             
         Returns:
             Ruta del archivo CSV generado
@@ -33,95 +273,81 @@ class ReportGenerator:
         if not results:
             return ""
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = (now or datetime.now()).strftime("%Y%m%d_%H%M%S")
         filename = f"analisis_mercados_{timestamp}.csv"
         filepath = Path(output_dir) / filename
         
         # Ordenar por Score_Final descendente
-        sorted_results = sorted(
-            results,
-            key=lambda x: x.final_score if x.final_score is not None else -999999,
-            reverse=True
-        )
+        sorted_results = _sort_by_score(results, attrgetter("final_score"))
         
-        # Escribir CSV
-        with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
+        # Escribir CSV (buffer grande + writerows sobre un generador de filas)
+        with open(filepath, 'w', newline='', encoding='utf-8', buffering=_CSV_WRITE_BUFFER) as csvfile:
             writer = csv.writer(csvfile)
-            
-            # Headers
-            headers = [
-                "Partido",
-                "Fecha_Hora_Colombia",
-                "Liga",
-                "Tipo_Mercado",
-                "Mercado",
-                "Mejor_Cuota",
-                "Mejor_Casa",
-                "Num_Casas",
-                "Score_Final",
-                "Diferencia_Cuota_Promedio",
-                "Volatilidad_Pct",
-                "Margen_Casa_Pct",
-                "Cuota_Promedio_Mercado",
-                "Todas_Las_Cuotas"
-            ]
-            writer.writerow(headers)
-            
-            # Rows
-            for result in sorted_results:
-                # Convertir a hora de Colombia
-                fecha_hora_utc = result.match.kickoff_time
-                fecha_hora_col = fecha_hora_utc.astimezone(self.timezone)
-                fecha_hora_str = fecha_hora_col.strftime('%Y-%m-%d %H:%M:%S')
-                
-                # Tipo de mercado legible
-                market_type_map = {
-                    MarketType.DOUBLE_CHANCE_1X: "Doble Chance",
-                    MarketType.DOUBLE_CHANCE_X2: "Doble Chance",
-                    MarketType.TOTALS: "Goles (Over/Under)",
-                    MarketType.BTTS: "Ambos Marcan",
-                    MarketType.H2H_Q1: "1X2 Primer Tiempo"
-                }
-                tipo_mercado = market_type_map.get(result.market, result.market.value)
-                
-                # Nombre del mercado
-                market_name = result.market_name if result.market_name else result.market.value
-                
-                # Valores opcionales
-                score_final = result.final_score if result.final_score is not None else ""
-                odds_diff = result.odds_advantage if result.odds_advantage is not None else ""
-                volatility = result.volatility_std if result.volatility_std is not None else ""
-                margin_bookmaker = result.bookmaker_margin if result.bookmaker_margin is not None else ""
-                avg_odds = result.avg_market_odds if result.avg_market_odds else ""
-                num_casas = result.num_bookmakers if result.num_bookmakers else ""
-                all_odds = result.all_odds_formatted if result.all_odds_formatted else ""
-                
-                row = [
-                    result.match_display,
-                    fecha_hora_str,
-                    result.match.league,
-                    tipo_mercado,
-                    market_name,
-                    result.best_odds,
-                    result.bookmaker.value,
-                    num_casas,
-                    score_final,
-                    odds_diff,
-                    volatility,
-                    margin_bookmaker,
-                    avg_odds,
-                    all_odds
-                ]
-                
-                writer.writerow(row)
+            writer.writerow(_COMBINED_CSV_HEADERS)
+            writer.writerows(self._combined_csv_rows(sorted_results))
         
         self.logger.info(f"CSV combinado generado: {filepath}")
         return str(filepath)
     
+    def _combined_csv_rows(self, sorted_results: List[AnalysisResult]) -> Iterator[List[Any]]:
+        """
+        Genera las filas del CSV combinado
+        
+        Args:
+            sorted_results: Resultados ya ordenados por Score_Final
+            
+        Yields:
+            Fila del CSV como lista de valores
+        """
+        tz = self.timezone
+        for result in sorted_results:
+            # Atributos usados varias veces por fila
+            match = result.match
+            market = result.market
+            
+            # Convertir a hora de Colombia
+            fecha_hora_col = match.kickoff_time.astimezone(tz)
+            # isoformat sin tzinfo: mismo texto que '%Y-%m-%d %H:%M:%S' sin pasar por strftime
+            fecha_hora_str = fecha_hora_col.replace(tzinfo=None).isoformat(sep=" ", timespec="seconds")
+            
+            # Tipo de mercado legible
+            tipo_mercado = _MARKET_TYPE_MAP.get(market, market.value)
+            
+            # Nombre del mercado
+            market_name = result.market_name or market.value
+            
+            # Valores opcionales
+            score_final = result.final_score if result.final_score is not None else ""
+            odds_diff = result.odds_advantage if result.odds_advantage is not None else ""
+            volatility = result.volatility_std if result.volatility_std is not None else ""
+            margin_bookmaker = result.bookmaker_margin if result.bookmaker_margin is not None else ""
+            avg_odds = result.avg_market_odds if result.avg_market_odds else ""
+            num_casas = result.num_bookmakers if result.num_bookmakers else ""
+            all_odds = result.all_odds_formatted if result.all_odds_formatted else ""
+            
+            yield [
+                result.match_display,
+                fecha_hora_str,
+                match.league,
+                tipo_mercado,
+                market_name,
+                result.best_odds,
+                result.bookmaker.value,
+                num_casas,
+                score_final,
+                odds_diff,
+                volatility,
+                margin_bookmaker,
+                avg_odds,
+                all_odds
+            ]
+    
+    
     def generate_analysis_table(
         self, 
         results: List[AnalysisResult],
-        show_all: bool = True
+        show_all: bool = True,
+        now: Optional[datetime] = None
     ) -> str:
         """
         Genera tabla completa de análisis en formato solicitado
@@ -129,6 +355,8 @@ class ReportGenerator:
         Args:
             results: Resultados del análisis
             show_all: Si mostrar todos los resultados o solo los que cumplen criterios
+            now: Momento de generación; pasarlo desde el llamador permite
+                compartir el mismo timestamp entre varios reportes
             
         Returns:
             Tabla formateada como string
@@ -141,12 +369,8 @@ class ReportGenerator:
         if not show_all:
             display_results = [r for r in results if r.meets_criteria]
         
-        # Ordenar por Score_Final descendente
-        display_results = sorted(
-            display_results,
-            key=lambda r: self._calculate_score_final(r) if self._calculate_score_final(r) is not None else -999999,
-            reverse=True
-        )
+        # Ordenar por Score_Final descendente (un solo cálculo del score por resultado)
+        display_results = _sort_by_score(display_results, self._calculate_score_final)
         
         # Preparar datos para la tabla
         table_data = []
@@ -163,7 +387,7 @@ class ReportGenerator:
             meets_emoji = "✅ Sí" if result.meets_criteria else "❌ No"
             
             # Formato del mercado
-            market_display = "1X (Local/Empate)" if result.market == MarketType.DOUBLE_CHANCE_1X else "X2 (Empate/Visitante)"
+            market_display = _MARKET_DISPLAY.get(result.market, "X2 (Empate/Visitante)")
             
             # Formato del margen
             margin_display = f"{result.bookmaker_margin:.1f}%" if result.bookmaker_margin else "N/D"
@@ -180,73 +404,38 @@ class ReportGenerator:
             ]
             table_data.append(row)
         
-        # Headers de la tabla
-        headers = [
-            "Partido",
-            "Mercado Analizado", 
-            "Cuota Más Alta",
-            "Casa de Apuestas",
-            "Margen Casa (%)",
-            "¿Cumple Criterios?",
-            "Fecha/Hora",
-            "Liga"
-        ]
-        
         # Generar tabla
-        table = tabulate(
-            table_data,
-            headers=headers,
-            tablefmt="grid",
-            stralign="left",
-            numalign="center"
-        )
+        table = _format_grid(table_data, _ANALYSIS_TABLE_HEADERS, _ANALYSIS_TABLE_ALIGN)
         
         # Generar resumen estadístico
         total_markets = len(display_results)
         compliance_rate = (meets_criteria_count / total_markets * 100) if total_markets > 0 else 0
         
         # Construir reporte completo
-        report = f"""📊 **ANÁLISIS VERÍDICO DE CUOTAS DE FÚTBOL**
-🔗 **Fuente**: The Odds API (datos 100% reales y oficiales)
-⚡ **Sin Scraping**: Solo datos autorizados y verificados
-✅ **Sin Simulación**: Todos los datos son reales de bookmakers activos
-📅 **Generado**: {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}
-
-📈 **RESUMEN EJECUTIVO**
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-• Total de mercados analizados: {total_markets}
-• Mercados que cumplen criterios: {meets_criteria_count}
-• Tasa de cumplimiento: {compliance_rate:.1f}%
-• Criterios aplicados: Prob. ≥ {results[0].min_prob_threshold:.0%}, Cuota ≥ {results[0].min_odds_threshold}
-
-📋 **TABLA DETALLADA**
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-{table}
-
-🔍 **VALIDACIÓN DE DATOS**
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-✅ Cuotas obtenidas de The Odds API en tiempo real
-✅ Filtrado automático por criterios establecidos
-✅ Sin manipulación ni simulación - 100% datos reales de bookmakers
-
-💡 **INTERPRETACIÓN**
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-• 1X: Gana equipo local O empate
-• X2: Empate O gana equipo visitante
-• Margen Casa: Ganancia garantizada de la casa (menor = mejor para apostador)
-• Score_Final: Cuota + (Ventaja_Margen / Margen_Casa) - Mayor score = mejor oportunidad
-• Criterios: Filtros para identificar oportunidades
-"""
+        report = _ANALYSIS_REPORT_TEMPLATE.format_map({
+            "generated_at": (now or datetime.now()).strftime("%d/%m/%Y %H:%M:%S"),
+            "total_markets": total_markets,
+            "meets_criteria_count": meets_criteria_count,
+            "compliance_rate": compliance_rate,
+            "min_prob": results[0].min_prob_threshold,
+            "min_odds": results[0].min_odds_threshold,
+            "table": table
+        })
         
         return report
     
-    def generate_summary_stats(self, results: List[AnalysisResult]) -> Dict[str, Any]:
+    def generate_summary_stats(
+        self,
+        results: List[AnalysisResult],
+        now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
         """
         Genera estadísticas resumidas del análisis
         
         Args:
             results: Resultados del análisis
+            now: Momento de generación; pasarlo desde el llamador permite
+                compartir el mismo timestamp entre varios reportes
             
         Returns:
             Diccionario con estadísticas
@@ -258,25 +447,32 @@ class ReportGenerator:
         total_markets = len(results)
         meets_criteria = sum(1 for r in results if r.meets_criteria)
         
-        # Distribución por mercado
-        markets_1x = sum(1 for r in results if r.market == MarketType.DOUBLE_CHANCE_1X)
-        markets_x2 = sum(1 for r in results if r.market == MarketType.DOUBLE_CHANCE_X2)
+        # Distribución por mercado y por bookmaker en una sola pasada
+        # (contadores indexados por posición del enum)
+        market_counts = [0] * len(MARKET_INDEX)
+        bookmaker_counts = [0] * len(BOOKMAKER_INDEX)
+        for result in results:
+            market_counts[MARKET_INDEX[result.market]] += 1
+            bookmaker_counts[BOOKMAKER_INDEX[result.bookmaker]] += 1
+        
+        markets_1x = market_counts[MARKET_INDEX[MarketType.DOUBLE_CHANCE_1X]]
+        markets_x2 = market_counts[MARKET_INDEX[MarketType.DOUBLE_CHANCE_X2]]
         
-        # Estadísticas de cuotas
-        all_odds = [r.best_odds for r in results]
-        all_probabilities = [r.implied_probability for r in results]
+        # Estadísticas de cuotas (min/max/promedio vectorizados)
+        all_odds = np.fromiter((r.best_odds for r in results), dtype=np.float64, count=total_markets)
+        all_probabilities = np.fromiter(
+            (r.implied_probability for r in results), dtype=np.float64, count=total_markets
+        )
         
         # Distribución por liga
-        leagues = {}
-        for result in results:
-            league = result.match.league
-            leagues[league] = leagues.get(league, 0) + 1
+        leagues = dict(Counter(result.match.league for result in results))
         
-        # Distribución por bookmaker
-        bookmakers = {}
-        for result in results:
-            bm = result.bookmaker.value
-            bookmakers[bm] = bookmakers.get(bm, 0) + 1
+        # Distribución por bookmaker (solo casas con resultados)
+        bookmakers = {
+            bm.value: count
+            for bm, count in zip(BookmakerType, bookmaker_counts)
+            if count
+        }
         
         return {
             "total_markets_analyzed": total_markets,
@@ -287,18 +483,18 @@ class ReportGenerator:
                 "X2_markets": markets_x2
             },
             "odds_statistics": {
-                "min_odds": round(min(all_odds), 2) if all_odds else 0,
-                "max_odds": round(max(all_odds), 2) if all_odds else 0,
-                "avg_odds": round(sum(all_odds) / len(all_odds), 2) if all_odds else 0
+                "min_odds": round(float(all_odds.min()), 2),
+                "max_odds": round(float(all_odds.max()), 2),
+                "avg_odds": round(float(all_odds.mean()), 2)
             },
             "probability_statistics": {
-                "min_probability": round(min(all_probabilities), 3) if all_probabilities else 0,
-                "max_probability": round(max(all_probabilities), 3) if all_probabilities else 0,
-                "avg_probability": round(sum(all_probabilities) / len(all_probabilities), 3) if all_probabilities else 0
+                "min_probability": round(float(all_probabilities.min()), 3),
+                "max_probability": round(float(all_probabilities.max()), 3),
+                "avg_probability": round(float(all_probabilities.mean()), 3)
             },
             "league_distribution": leagues,
             "bookmaker_distribution": bookmakers,
-            "analysis_timestamp": datetime.now().isoformat()
+            "analysis_timestamp": (now or datetime.now()).isoformat()
         }
     
     def generate_compliance_report(self, results: List[AnalysisResult]) -> str:
@@ -311,8 +507,9 @@ class ReportGenerator:
         Returns:
             Reporte de cumplimiento formateado
         """
+        # Una sola pasada: los rechazados solo se cuentan
         compliant_results = [r for r in results if r.meets_criteria]
-        non_compliant_results = [r for r in results if not r.meets_criteria]
+        non_compliant_count = len(results) - len(compliant_results)
         
         if not compliant_results:
             return """🔍 **REPORTE DE CUMPLIMIENTO**
@@ -329,7 +526,7 @@ class ReportGenerator:
         compliant_data = []
         for result in compliant_results:
             kickoff = result.match.kickoff_time.strftime("%d/%m %H:%M")
-            market_display = "1X" if result.market == MarketType.DOUBLE_CHANCE_1X else "X2"
+            market_display = _MARKET_CODE.get(result.market, "X2")
             margin_display = f"{result.bookmaker_margin:.1f}%" if result.bookmaker_margin else "N/D"
             
             compliant_data.append([
@@ -341,11 +538,7 @@ class ReportGenerator:
                 kickoff
             ])
         
-        compliant_table = tabulate(
-            compliant_data,
-            headers=["Partido", "Mercado", "Cuota", "Bookmaker", "Margen", "Hora"],
-            tablefmt="grid"
-        )
+        compliant_table = _format_grid(compliant_data, _COMPLIANCE_TABLE_HEADERS, _COMPLIANCE_TABLE_ALIGN)
         
         compliance_rate = len(compliant_results) / len(results) * 100 if results else 0
         
@@ -355,7 +548,7 @@ class ReportGenerator:
 📊 **RESUMEN**
 • Mercados que cumplen: {len(compliant_results)}/{len(results)}
 • Tasa de cumplimiento: {compliance_rate:.1f}%
-• Mercados rechazados: {len(non_compliant_results)}
+• Mercados rechazados: {non_compliant_count}
 
 ✅ **MERCADOS QUE CUMPLEN CRITERIOS**
 {compliant_table}
@@ -397,15 +590,6 @@ class ReportGenerator:
         if not results:
             return "No hay datos para exportar"
         
-        # Obtener todos los bookmakers únicos de todos los resultados
-        all_bookmakers = set()
-        for result in results:
-            if result.match_odds and result.match_odds.odds_h2h:
-                for h2h in result.match_odds.odds_h2h:
-                    all_bookmakers.add(h2h.bookmaker.value)
-        
-        bookmaker_list = sorted(all_bookmakers)
-        
         # Construir encabezados dinámicamente
         headers = ["Partido", "Fecha_Hora_COT", "Score_Final", "Diferencia_Cuota_Promedio",
                    "Mercado", "Cuota", "Casa_Apuestas", "Volatilidad_Pct",
@@ -413,52 +597,44 @@ class ReportGenerator:
                    "Cuota_Promedio_Mercado",
                    "Bwin_Cuota_1", "Bwin_Cuota_X", "Bwin_Cuota_2", "Bwin_Margen_Pct"]
         
-        csv_lines = [",".join(headers)]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(headers)
         
-        # Ordenar por Score_Final descendente
-        sorted_results = sorted(
-            [r for r in results if self._calculate_score_final(r) is not None],
-            key=lambda x: self._calculate_score_final(x),
-            reverse=True
-        )
+        # Ordenar por Score_Final descendente (score calculado una sola vez)
+        scored = [(s, r) for r in results if (s := self._calculate_score_final(r)) is not None]
+        scored.sort(key=itemgetter(0), reverse=True)
         
-        for result in sorted_results:
-            market_code = "1X" if result.market == MarketType.DOUBLE_CHANCE_1X else "X2"
-            cumple = "SI" if result.meets_criteria else "NO"
+        writer.writerows(self._export_csv_rows(scored))
+        return buffer.getvalue()
+    
+    def _export_csv_rows(self, scored: List[Tuple[float, AnalysisResult]]) -> Iterator[List[Any]]:
+        """
+        Genera las filas de export_to_csv_format
+        
+        Args:
+            scored: Pares (score_final, resultado) ya ordenados
+            
+        Yields:
+            Fila del CSV como lista de valores
+        """
+        for score_final, result in scored:
+            # Atributos usados varias veces por fila
+            match_odds = result.match_odds
+            
+            market_code = _MARKET_CODE.get(result.market, "X2")
             
             # Convertir a GMT-5 (hora colombiana)
-            fecha_hora_utc = result.match.kickoff_time
-            fecha_hora_col = fecha_hora_utc - timedelta(hours=5)
-            fecha_hora_str = fecha_hora_col.strftime("%Y-%m-%d %H:%M")
-            
-            margin_bookmaker = result.bookmaker_margin if result.bookmaker_margin else ""
-            margin_avg = result.avg_market_margin if result.avg_market_margin else ""
-            margin_advantage = result.margin_advantage if result.margin_advantage else ""
-            
-            # Calcular Score_Final: Cuota + (Ventaja_Margen / Margen_Casa)
-            score_final = ""
-            if result.margin_advantage and result.bookmaker_margin and result.bookmaker_margin > 0:
-                score_final = round(
-                    (result.margin_advantage / result.bookmaker_margin),
-                    4
-                )
-            
-            # Crear diccionario de márgenes por bookmaker
-            margins_dict = {}
-            h2h_dict = {}
-            if result.match_odds and result.match_odds.odds_h2h:
-                for h2h in result.match_odds.odds_h2h:
-                    bm_name = h2h.bookmaker.value
-                    margins_dict[bm_name] = round(h2h.overround_percentage, 2)
-                    h2h_dict[bm_name] = {
-                        "home": h2h.home_odds,
-                        "draw": h2h.draw_odds,
-                        "away": h2h.away_odds
-                    }
+            fecha_hora_col = result.match.kickoff_time - timedelta(hours=5)
+            fecha_hora_str = fecha_hora_col.replace(tzinfo=None).isoformat(sep=" ", timespec="minutes")
+            
+            margin_bookmaker = _blank_if_none(result.bookmaker_margin)
+            margin_avg = _blank_if_none(result.avg_market_margin)
+            margin_advantage = _blank_if_none(result.margin_advantage)
             
             # Calcular diferencia entre mejor cuota y promedio
-            avg_odds = result.avg_market_odds if result.avg_market_odds else ""
-            odds_diff = result.odds_advantage if result.odds_advantage else ""
+            avg_odds = _blank_if_none(result.avg_market_odds)
+            odds_diff = _blank_if_none(result.odds_advantage)
             
             # Obtener cuotas de Bwin si existen
             bwin_home = ""
@@ -466,41 +642,36 @@ class ReportGenerator:
             bwin_away = ""
             bwin_margin = ""
             
-            if result.match_odds and result.match_odds.odds_h2h:
-                for h2h in result.match_odds.odds_h2h:
-                    if h2h.bookmaker.value == "bwin":
-                        bwin_home = h2h.home_odds
-                        bwin_draw = h2h.draw_odds
-                        bwin_away = h2h.away_odds
-                        bwin_margin = round(h2h.overround_percentage, 2)
-                        break
+            if match_odds and match_odds.odds_h2h:
+                bwin = match_odds.h2h_by_bookmaker.get(BookmakerType.BWIN)
+                if bwin is not None:
+                    bwin_home = bwin.home_odds
+                    bwin_draw = bwin.draw_odds
+                    bwin_away = bwin.away_odds
+                    bwin_margin = f"{bwin.overround_percentage:.2f}"
             
             # Obtener volatilidad
             volatility = result.volatility_std if result.volatility_std is not None else ""
             
-            # Construir línea CSV
-            row_data = [
-                f'"{result.match_display}"',
-                f'"{fecha_hora_str}"',
-                str(score_final),
-                str(odds_diff),
-                f'"{market_code}"',
-                str(result.best_odds),
-                f'"{result.bookmaker.value}"',
-                str(volatility),
-                str(margin_bookmaker),
-                str(margin_avg),
-                str(margin_advantage),
-                str(avg_odds),
-                str(bwin_home),
-                str(bwin_draw),
-                str(bwin_away),
-                str(bwin_margin)
+            # Construir fila CSV (el escape lo hace csv.writer)
+            yield [
+                result.match_display,
+                fecha_hora_str,
+                score_final,
+                odds_diff,
+                market_code,
+                result.best_odds,
+                result.bookmaker.value,
+                volatility,
+                margin_bookmaker,
+                margin_avg,
+                margin_advantage,
+                avg_odds,
+                bwin_home,
+                bwin_draw,
+                bwin_away,
+                bwin_margin
             ]
-            
-            csv_lines.append(",".join(row_data))
-        
-        return "\n".join(csv_lines)
     
     def calculate_value_metrics(self, result: AnalysisResult) -> Dict[str, float]:
         """
@@ -533,102 +704,104 @@ class ReportGenerator:
         
         return metrics
     
-    def export_ranking_analysis(self, results: List[AnalysisResult], output_dir: str = ".") -> Tuple[str, str]:
+    def export_ranking_analysis(
+        self,
+        results: List[AnalysisResult],
+        output_dir: str = ".",
+        now: Optional[datetime] = None
+    ) -> str:
         """
         Genera CSV con análisis de ranking matemático
         
         Args:
             results: Resultados del análisis
             output_dir: Directorio donde guardar el archivo
+            now: Momento de generación; pasarlo desde el llamador permite
+                compartir el mismo timestamp entre varios reportes
             
         Returns:
-            Tupla (ruta_archivo, contenido_csv)
+            Ruta del archivo generado, o cadena vacía si no hay datos o falla la escritura
         """
         # Filtrar solo resultados que cumplen criterios
         compliant_results = [r for r in results if r.meets_criteria]
         
         if not compliant_results:
             self.logger.warning("No hay resultados que cumplan criterios para ranking")
-            return ("", "No hay datos para ranking")
+            return ""
         
         # Calcular métricas para cada resultado
         ranking_data = []
         for result in compliant_results:
             metrics = self.calculate_value_metrics(result)
             
-            market_code = "1X" if result.market == MarketType.DOUBLE_CHANCE_1X else "X2"
+            market_code = _MARKET_CODE.get(result.market, "X2")
             fecha_hora_col = result.match.kickoff_time - timedelta(hours=5)
             
-            ranking_data.append({
+            # La clave de orden se guarda junto al item (sin doble lookup por comparación)
+            ranking_data.append((metrics["score_final"], {
                 "result": result,
                 "metrics": metrics,
                 "market_code": market_code,
-                "fecha_hora": fecha_hora_col.strftime("%Y-%m-%d %H:%M")
-            })
+                "fecha_hora": fecha_hora_col.replace(tzinfo=None).isoformat(sep=" ", timespec="minutes")
+            }))
         
         # Ordenar por score_final descendente
-        ranking_data.sort(key=lambda x: x["metrics"]["score_final"], reverse=True)
-        
-        # Generar CSV
-        csv_lines = []
-        
-        # Headers
-        headers = [
-            "Rank",
-            "Partido",
-            "Mercado",
-            "Cuota",
-            "Casa_Apuestas",
-            "Margen_Casa_Pct",
-            "Margen_Mercado_Promedio_Pct",
-            "Ventaja_Margen_Pct",
-            "Cuota_Premium",
-            "Value_Score_Pct",
-            "Inverso_Margen_Casa",
-            "Score_Final",
-            "Fecha_Hora_COT",
-            "Liga"
-        ]
-        csv_lines.append(",".join(headers))
-        
-        # Datos
-        for rank, item in enumerate(ranking_data, 1):
-            result = item["result"]
-            metrics = item["metrics"]
-            
-            row = [
-                str(rank),
-                f'"{result.match_display}"',
-                f'"{item["market_code"]}"',
-                str(result.best_odds),
-                f'"{result.bookmaker.value}"',
-                str(result.bookmaker_margin if result.bookmaker_margin else ""),
-                str(result.avg_market_margin if result.avg_market_margin else ""),
-                str(result.margin_advantage if result.margin_advantage else ""),
-                str(metrics["cuota_premium"]),
-                str(metrics["value_score_pct"]),
-                str(metrics["inverso_margen_casa"]),
-                str(metrics["score_final"]),
-                f'"{item["fecha_hora"]}"',
-                f'"{result.match.league}"'
-            ]
-            csv_lines.append(",".join(row))
+        ranking_data.sort(key=itemgetter(0), reverse=True)
         
-        csv_content = "\n".join(csv_lines)
-        
-        # Guardar archivo
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Guardar archivo (las filas se escriben directo, sin armar el CSV completo en memoria)
+        timestamp = (now or datetime.now()).strftime("%Y%m%d_%H%M%S")
         filename = f"ranking_value_{timestamp}.csv"
         filepath = os.path.join(output_dir, filename)
         
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(csv_content)
+            with open(filepath, 'w', newline='', encoding='utf-8', buffering=_CSV_WRITE_BUFFER) as f:
+                self._write_ranking_csv(f, ranking_data)
             self.logger.info(f"Ranking exportado a: {filename}")
         except Exception as e:
             self.logger.error(f"Error al guardar ranking: {e}")
             filepath = ""
         
-        return (filepath, csv_content)
+        return filepath
+    
+    def _write_ranking_csv(self, stream: TextIO, ranking_data: List[Tuple[float, Dict[str, Any]]]) -> None:
+        """
+        Escribe el CSV de ranking en un stream de texto
         
-        return "\n".join(csv_lines)
\ No newline at end of file
+        Args:
+            stream: Archivo o buffer de destino
+            ranking_data: Pares (score_final, item) ya ordenados
+        """
+        writer = csv.writer(stream, lineterminator="\n")
+        writer.writerow(_RANKING_CSV_HEADERS)
+        writer.writerows(self._ranking_csv_rows(ranking_data))
+    
+    def _ranking_csv_rows(self, ranking_data: List[Tuple[float, Dict[str, Any]]]) -> Iterator[List[Any]]:
+        """
+        Genera las filas del CSV de ranking
+        
+        Args:
+            ranking_data: Pares (score_final, item) ya ordenados
+            
+        Yields:
+            Fila del CSV como lista de valores
+        """
+        for rank, (_, item) in enumerate(ranking_data, 1):
+            result = item["result"]
+            metrics = item["metrics"]
+            
+            yield [
+                rank,
+                result.match_display,
+                item["market_code"],
+                result.best_odds,
+                result.bookmaker.value,
+                _blank_if_none(result.bookmaker_margin),
+                _blank_if_none(result.avg_market_margin),
+                _blank_if_none(result.margin_advantage),
+                metrics["cuota_premium"],
+                metrics["value_score_pct"],
+                metrics["inverso_margen_casa"],
+                metrics["score_final"],
+                item["fecha_hora"],
+                result.match.league
+            ]
\ No newline at end of file
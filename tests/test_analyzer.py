@@ -5,14 +5,14 @@ Tests para el analizador de cuotas de fútbol
 import pytest
 import asyncio
 import os
-from datetime import datetime, timezone
-from unittest.mock import Mock, patch, MagicMock
+from datetime import datetime, timezone, timedelta
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
-from src.models import Match, OddsData, MarketType, BookmakerType
+from src.models import Match, OddsData, MatchOdds, H2HOdds, MarketType, BookmakerType
 from src.analyzer import FootballOddsAnalyzer
 
 
@@ -104,6 +104,144 @@ class TestFootballOddsAnalyzer:
         # Debe eliminar el duplicado
         assert len(unique_matches) == 2
         assert any(m.home_team == "Team C" for m in unique_matches)
+    
+    @patch.dict(os.environ, {"THE_ODDS_API_KEY": "test_key"})
+    def test_analyze_match_odds_double_chance(self, sample_match):
+        """Test del análisis de mercados 1X y X2"""
+        analyzer = FootballOddsAnalyzer()
+        now = datetime.now(timezone.utc)
+        
+        match_odds = MatchOdds(
+            match=sample_match,
+            odds_1x=[
+                OddsData(bookmaker=BookmakerType.PINNACLE, market=MarketType.DOUBLE_CHANCE_1X, odds=1.40, timestamp=now),
+                OddsData(bookmaker=BookmakerType.BETSSON, market=MarketType.DOUBLE_CHANCE_1X, odds=1.50, timestamp=now),
+            ],
+            odds_x2=[
+                OddsData(bookmaker=BookmakerType.PINNACLE, market=MarketType.DOUBLE_CHANCE_X2, odds=1.80, timestamp=now),
+            ],
+            odds_h2h=[
+                H2HOdds(bookmaker=BookmakerType.BETSSON, home_odds=2.0, draw_odds=3.5, away_odds=4.0, timestamp=now),
+            ]
+        )
+        
+        results = analyzer.analyze_match_odds(match_odds)
+        
+        # X2 se descarta por tener una sola casa
+        assert len(results) == 1
+        result = results[0]
+        assert result.market == MarketType.DOUBLE_CHANCE_1X
+        assert result.market_name == "1X"
+        assert result.best_odds == 1.50
+        assert result.bookmaker == BookmakerType.BETSSON
+        assert result.avg_market_odds == 1.45
+        assert result.num_bookmakers == 2
+        assert result.all_odds_formatted == "betsson:1.5; pinnacle:1.4"
+        assert result.bookmaker_margin == round(match_odds.odds_h2h[0].overround_percentage, 2)
+        assert result.volatility_std == round(0.05 / 1.45 * 100, 2)
+    
+    @patch.dict(os.environ, {"THE_ODDS_API_KEY": "test_key"})
+    def test_analyze_grouped_market_totals(self, sample_match):
+        """Test del análisis de mercados Over/Under con cálculo de margen"""
+        analyzer = FootballOddsAnalyzer()
+        now = datetime.now(timezone.utc)
+        
+        odds_data = []
+        for bookmaker, over, under in [
+            (BookmakerType.PINNACLE, 1.90, 1.95),
+            (BookmakerType.BETSSON, 1.85, 2.00),
+        ]:
+            odds_data.append({"bookmaker": bookmaker, "market_name": "Over", "odds": over, "point": 2.5, "timestamp": now})
+            odds_data.append({"bookmaker": bookmaker, "market_name": "Under", "odds": under, "point": 2.5, "timestamp": now})
+        
+        results = analyzer._analyze_grouped_market(sample_match, odds_data, MarketType.TOTALS)
+        by_name = {r.market_name: r for r in results}
+        
+        assert set(by_name) == {"Over 2.5", "Under 2.5"}
+        
+        over = by_name["Over 2.5"]
+        assert over.best_odds == 1.90
+        assert over.bookmaker == BookmakerType.PINNACLE
+        assert over.bookmaker_margin == round((1 / 1.90 + 1 / 1.95 - 1) * 100, 2)
+        
+        margin_pinnacle = (1 / 1.90 + 1 / 1.95 - 1) * 100
+        margin_betsson = (1 / 1.85 + 1 / 2.00 - 1) * 100
+        assert over.avg_market_margin == round((margin_pinnacle + margin_betsson) / 2, 2)
+        assert over.avg_market_odds == 1.875
+        assert over.all_odds_formatted == "pinnacle:1.9; betsson:1.85"
+        
+        under = by_name["Under 2.5"]
+        assert under.best_odds == 2.00
+        assert under.bookmaker == BookmakerType.BETSSON
+        assert under.bookmaker_margin == round((1 / 2.00 + 1 / 1.85 - 1) * 100, 2)
+
+    
+    @patch.dict(os.environ, {"THE_ODDS_API_KEY": "test_key"})
+    def test_get_upcoming_matches_time_window(self):
+        """Test del filtrado de partidos por ventana de tiempo"""
+        analyzer = FootballOddsAnalyzer()
+        now = datetime.now(timezone.utc)
+        
+        matches = [
+            Match(
+                id=str(hours), home_team=f"Home {hours}", away_team=f"Away {hours}",
+                league="Test League", country="Test",
+                kickoff_time=now + timedelta(hours=hours),
+                sport_key="test"
+            )
+            for hours in [50, -2, 10, 30, 5, 100]
+        ]
+        analyzer.odds_client.get_football_matches = AsyncMock(return_value=matches)
+        
+        upcoming = asyncio.run(analyzer.get_upcoming_matches(hours_ahead=48, hours_from=4))
+        
+        # Solo partidos dentro de [4h, 48h], ordenados por hora de inicio
+        assert [m.id for m in upcoming] == ["5", "10", "30"]
+    
+    @patch.dict(os.environ, {"THE_ODDS_API_KEY": "test_key"})
+    def test_analyze_all_matches_bulk_odds_with_fallback(self):
+        """Test que las ligas se piden en bloque en paralelo y una liga fallida se pide por partido"""
+        analyzer = FootballOddsAnalyzer()
+        now = datetime.now(timezone.utc)
+        
+        match_a = Match(id="a", home_team="Home A", away_team="Away A", league="League A",
+                        country="Test", kickoff_time=now + timedelta(hours=5), sport_key="league_a")
+        match_b = Match(id="b", home_team="Home B", away_team="Away B", league="League B",
+                        country="Test", kickoff_time=now + timedelta(hours=6), sport_key="league_b")
+        
+        odds_a = [
+            OddsData(bookmaker=BookmakerType.PINNACLE, market=MarketType.DOUBLE_CHANCE_1X, odds=1.40, timestamp=now),
+            OddsData(bookmaker=BookmakerType.BETSSON, market=MarketType.DOUBLE_CHANCE_1X, odds=1.50, timestamp=now),
+        ]
+        
+        in_flight = 0
+        max_in_flight = 0
+        
+        async def fake_bulk(sport_key):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            # league_b falla en bloque
+            return {"a": (odds_a, [])} if sport_key == "league_a" else None
+        
+        analyzer.get_upcoming_matches = AsyncMock(return_value=[match_a, match_b])
+        analyzer.odds_client.get_odds_bulk = AsyncMock(side_effect=fake_bulk)
+        analyzer.odds_client.get_match_odds = AsyncMock(return_value=([], []))
+        analyzer.odds_client.get_remaining_requests = AsyncMock(return_value=500)
+        analyzer.bwin_client.get_bwin_odds = AsyncMock(return_value=([], []))
+        analyzer.analyze_additional_markets = AsyncMock(return_value=[])
+        
+        results = asyncio.run(analyzer.analyze_all_matches(min_probability=0.6, min_odds=1.3))
+        
+        # Las dos ligas se pidieron a la vez
+        assert max_in_flight == 2
+        # Solo el partido de la liga fallida se pide individualmente
+        analyzer.odds_client.get_match_odds.assert_awaited_once_with("b", "league_b")
+        # El partido de league_a se analiza con las cuotas del bloque
+        assert [r.match.id for r in results] == ["a"]
+        assert results[0].best_odds == 1.50
 
 
 class TestValidation:
@@ -0,0 +1,56 @@
+"""
+Tests para los modelos de datos
+"""
+
+from datetime import datetime, timezone
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from src.models import Match, H2HOdds, BookmakerType
+
+
+class TestModelConstruct:
+    """Tests que los modelos creados sin validación equivalen a los validados"""
+
+    def test_h2h_odds_construct_equals_validated(self):
+        """Test que H2HOdds.model_construct produce el mismo modelo y overround"""
+        now = datetime.now(timezone.utc)
+        fields = dict(
+            bookmaker=BookmakerType.PINNACLE,
+            home_odds=2.10,
+            draw_odds=3.40,
+            away_odds=3.60,
+            timestamp=now
+        )
+
+        constructed = H2HOdds.model_construct(**fields)
+        validated = H2HOdds(**fields)
+
+        assert constructed == validated
+        assert constructed.model_fields_set == validated.model_fields_set
+        assert constructed.model_dump() == validated.model_dump()
+
+        expected_overround = 1 / 2.10 + 1 / 3.40 + 1 / 3.60 - 1.0
+        assert constructed.overround == validated.overround == expected_overround
+        assert constructed.overround_percentage == validated.overround_percentage == expected_overround * 100
+
+    def test_match_construct_equals_validated(self):
+        """Test que Match.model_construct produce el mismo modelo que la validación"""
+        fields = dict(
+            id="match_1",
+            home_team="Home FC",
+            away_team="Away FC",
+            league="EPL",
+            country="England",
+            kickoff_time=datetime(2025, 3, 10, 18, 0, tzinfo=timezone.utc),
+            sport_key="soccer_epl"
+        )
+
+        constructed = Match.model_construct(**fields)
+        validated = Match(**fields)
+
+        assert constructed == validated
+        assert constructed.model_dump() == validated.model_dump()
+        assert str(constructed) == str(validated)
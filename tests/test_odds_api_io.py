@@ -0,0 +1,146 @@
+"""
+Tests para el cliente de Odds-API.io (búsqueda de eventos de Bwin)
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import httpx
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from src.apis.odds_api_io import OddsAPIIOClient
+from src.models import Match
+
+
+EVENTS = [
+    {"id": "null_event", "home": None, "away": "Chelsea"},
+    {"id": "exact", "home": "Real Madrid", "away": "Barcelona"},
+    {"id": "normalized", "home": "  Arsenal ", "away": "TOTTENHAM"},
+    {"id": "substring", "home": "Manchester United FC", "away": "Liverpool FC"},
+]
+
+
+class TestFindEventId:
+    """Tests de la búsqueda del evento correspondiente a un partido"""
+
+    def setup_method(self):
+        self.client = OddsAPIIOClient()
+
+    def test_exact_match(self):
+        """Test de coincidencia exacta de nombres"""
+        assert self.client._find_event_id(EVENTS, "Real Madrid", "Barcelona") == "exact"
+
+    def test_normalized_match(self):
+        """Test que mayúsculas y espacios extremos no impiden la coincidencia"""
+        assert self.client._find_event_id(EVENTS, "arsenal", "Tottenham") == "normalized"
+
+    def test_substring_fallback(self):
+        """Test que sin coincidencia exacta se busca por subcadena"""
+        assert self.client._find_event_id(EVENTS, "Manchester United", "Liverpool") == "substring"
+
+    def test_null_team_name(self):
+        """Test que un equipo null no rompe la búsqueda ni coincide con cualquier partido"""
+        assert self.client._find_event_id(EVENTS, "Unknown", "Chelsea") is None
+        assert self.client._find_event_id(EVENTS, "Real Madrid", "Barcelona") == "exact"
+
+    def test_prebuilt_index_is_reused(self):
+        """Test que un índice construido una vez sirve para varios partidos"""
+        index = OddsAPIIOClient._build_event_index(EVENTS)
+
+        assert self.client._find_event_id(EVENTS, "Real Madrid", "Barcelona", index) == "exact"
+        assert self.client._find_event_id(EVENTS, "arsenal", "tottenham", index) == "normalized"
+
+
+class TestEventsCache:
+    """Tests de la reutilización de la lista de eventos entre partidos"""
+
+    def make_match(self, home, away):
+        return Match(
+            id=f"{home}-{away}", home_team=home, away_team=away, league="La Liga",
+            country="Spain", kickoff_time=datetime.now(timezone.utc)
+        )
+
+    def test_events_fetched_once_for_several_matches(self):
+        """Test que varios get_bwin_odds (incluso concurrentes) piden /events una sola vez"""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            if request.url.path.endswith("/events"):
+                return httpx.Response(200, json=EVENTS)
+            return httpx.Response(200, json={"bookmakers": {}})
+
+        http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with patch.dict("os.environ", {"ODDS_API_IO_KEY": "test"}):
+            client = OddsAPIIOClient(client=http_client)
+
+        async def run():
+            await asyncio.gather(
+                client.get_bwin_odds(self.make_match("Real Madrid", "Barcelona")),
+                client.get_bwin_odds(self.make_match("Arsenal", "Tottenham")),
+            )
+            await client.get_bwin_odds(self.make_match("Manchester United", "Liverpool"))
+
+        asyncio.run(run())
+
+        paths = [request.url.path for request in requests]
+        assert paths.count("/v3/events") == 1
+        assert paths.count("/v3/odds") == 3
+
+    def test_events_refetched_after_ttl(self):
+        """Test que pasado EVENTS_TTL la lista de eventos se vuelve a pedir"""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json=EVENTS)
+
+        http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with patch.dict("os.environ", {"ODDS_API_IO_KEY": "test"}):
+            client = OddsAPIIOClient(client=http_client)
+
+        with patch("src.apis.odds_api_io.time.monotonic", return_value=1000.0):
+            asyncio.run(client._get_events())
+        with patch("src.apis.odds_api_io.time.monotonic", return_value=1000.0 + client.EVENTS_TTL):
+            asyncio.run(client._get_events())
+        with patch("src.apis.odds_api_io.time.monotonic", return_value=1000.0 + client.EVENTS_TTL + 1):
+            _, index = asyncio.run(client._get_events())
+
+        assert len(requests) == 2
+        assert index[("real madrid", "barcelona")] == "exact"
+
+
+class TestBwinOddsParsing:
+    """Tests de la conversión del mercado ML de Bwin"""
+
+    def run_with_ml_odds(self, ml_odds):
+        """Ejecuta get_bwin_odds con un mercado ML dado; devuelve (odds_data, h2h_odds)"""
+        def handler(request):
+            if request.url.path.endswith("/events"):
+                return httpx.Response(200, json=EVENTS)
+            return httpx.Response(200, json={"bookmakers": {"Bwin": [{"name": "ML", "odds": [ml_odds]}]}})
+
+        http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with patch.dict("os.environ", {"ODDS_API_IO_KEY": "test"}):
+            client = OddsAPIIOClient(client=http_client)
+        match = Match(
+            id="m1", home_team="Real Madrid", away_team="Barcelona", league="La Liga",
+            country="Spain", kickoff_time=datetime.now(timezone.utc)
+        )
+        return asyncio.run(client.get_bwin_odds(match))
+
+    def test_valid_prices(self):
+        """Test que cuotas válidas generan H2H y doble oportunidad"""
+        odds_data, h2h_odds = self.run_with_ml_odds({"home": "2.10", "draw": "3.40", "away": "3.60"})
+
+        assert (h2h_odds[0].home_odds, h2h_odds[0].draw_odds, h2h_odds[0].away_odds) == (2.10, 3.40, 3.60)
+        assert len(odds_data) == 2
+
+    def test_invalid_prices_are_skipped(self):
+        """Test que cuotas 0, 1.0 o no numéricas no generan cuotas"""
+        for draw in ("0", 1.0, "abc", None):
+            assert self.run_with_ml_odds({"home": "2.10", "draw": draw, "away": "3.60"}) == ([], [])
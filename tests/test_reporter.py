@@ -0,0 +1,132 @@
+"""
+Tests para el generador de reportes
+"""
+
+import csv
+from datetime import datetime, timezone
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from src.models import Match, AnalysisResult, MarketType, BookmakerType
+from src.reporter import ReportGenerator, _format_grid, _display_width
+
+
+class TestFormatGrid:
+    """Tests del formateador de tablas en estilo grid"""
+
+    def test_grid_layout(self):
+        """Test del formato con filas: bordes, separador de encabezado y alineación"""
+        table = _format_grid(
+            [["H vs A", "1.50"], ["Home vs Away", "12.00"]],
+            ["Partido", "Cuota"],
+            ("<", ">")
+        )
+
+        assert table.split("\n") == [
+            "+--------------+---------+",
+            "| Partido      |   Cuota |",
+            "+==============+=========+",
+            "| H vs A       |    1.50 |",
+            "+--------------+---------+",
+            "| Home vs Away |   12.00 |",
+            "+--------------+---------+",
+        ]
+
+    def test_empty_table(self):
+        """Test que una tabla sin filas se ve como la de tabulate (encabezado, '=' y cierre)"""
+        table = _format_grid([], ["Partido", "Mercado"])
+
+        assert table.split("\n") == [
+            "+-----------+-----------+",
+            "| Partido   | Mercado   |",
+            "+===========+===========+",
+            "+-----------+-----------+",
+        ]
+
+    def test_unicode_cell_widths(self):
+        """Test que emojis y acentos se alinean por ancho en pantalla, no por len()"""
+        table = _format_grid([["✅ Sí", "Brasileirão"], ["❌ No", "x"]], ["Cumple", "Liga"])
+        lines = table.split("\n")
+
+        assert _display_width("✅ Sí") == 5
+        assert _display_width("Brasileirão") == 11
+        # Todas las líneas ocupan el mismo ancho en pantalla
+        assert len({_display_width(line) for line in lines}) == 1
+        assert lines[3] == "| ✅ Sí    | Brasileirão |"
+
+    def test_centered_column(self):
+        """Test que el centrado deja el espacio sobrante a la derecha"""
+        table = _format_grid([["1.5"]], ["Cuota"], ("^",))
+
+        assert table.split("\n")[3] == "|   1.5   |"
+
+
+class TestAnalysisTable:
+    """Tests de la tabla de análisis"""
+
+    def test_no_qualifying_results_renders_empty_grid(self):
+        """Test que show_all=False sin mercados que cumplan muestra la tabla vacía"""
+        now = datetime.now(timezone.utc)
+        match = Match(
+            id="m1", home_team="Home", away_team="Away", league="Test League",
+            country="Test", kickoff_time=now, sport_key="test"
+        )
+        result = AnalysisResult(
+            match=match, market=MarketType.DOUBLE_CHANCE_1X, best_odds=1.20,
+            bookmaker=BookmakerType.PINNACLE, implied_probability=1 / 1.20,
+            meets_criteria=False, min_prob_threshold=0.7, min_odds_threshold=1.3
+        )
+
+        report = ReportGenerator().generate_analysis_table([result], show_all=False, now=now)
+
+        assert "Total de mercados analizados: 0" in report
+        assert "+===" in report
+        assert "| Partido " in report
+        assert "Home vs Away" not in report
+
+
+class TestRankingExport:
+    """Tests del CSV de ranking"""
+
+    def make_result(self, match_id, best_odds, bookmaker_margin, meets_criteria=True):
+        match = Match(
+            id=match_id, home_team=f"Home {match_id}", away_team=f"Away {match_id}",
+            league="Test League", country="Test",
+            kickoff_time=datetime(2025, 3, 10, 18, 0, tzinfo=timezone.utc), sport_key="test"
+        )
+        return AnalysisResult(
+            match=match, market=MarketType.DOUBLE_CHANCE_1X, best_odds=best_odds,
+            bookmaker=BookmakerType.PINNACLE, implied_probability=1 / best_odds,
+            meets_criteria=meets_criteria, min_prob_threshold=0.7, min_odds_threshold=1.3,
+            bookmaker_margin=bookmaker_margin, avg_market_margin=5.0,
+            margin_advantage=5.0 - bookmaker_margin
+        )
+
+    def test_writes_sorted_csv_and_returns_path(self, tmp_path):
+        """Test que el ranking se escribe al archivo ordenado por score y se devuelve la ruta"""
+        results = [
+            self.make_result("low", 1.35, 4.0),
+            self.make_result("high", 1.40, 2.0),
+            self.make_result("excluded", 1.50, 1.0, meets_criteria=False),
+        ]
+        now = datetime(2025, 3, 10, 12, 30, 0)
+
+        filepath = ReportGenerator().export_ranking_analysis(results, str(tmp_path), now=now)
+
+        assert filepath == str(tmp_path / "ranking_value_20250310_123000.csv")
+        with open(filepath, newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+        assert rows[0][:3] == ["Rank", "Partido", "Mercado"]
+        assert [row[1] for row in rows[1:]] == ["Home high vs Away high", "Home low vs Away low"]
+        assert [row[0] for row in rows[1:]] == ["1", "2"]
+        assert rows[1][2] == "1X"
+        assert rows[1][-2:] == ["2025-03-10 13:00", "Test League"]
+
+    def test_no_compliant_results_returns_empty_path(self, tmp_path):
+        """Test que sin resultados que cumplan no se crea archivo"""
+        results = [self.make_result("excluded", 1.50, 1.0, meets_criteria=False)]
+
+        assert ReportGenerator().export_ranking_analysis(results, str(tmp_path)) == ""
+        assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,283 @@
+"""
+Tests para el cliente de The Odds API
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from src.apis.the_odds_api import TheOddsAPIClient
+from src.models import BookmakerType, H2HOdds
+
+
+def make_event(match_id="match_1"):
+    """Evento de The Odds API con un mercado h2h de Pinnacle"""
+    return {
+        "id": match_id,
+        "home_team": "Home FC",
+        "away_team": "Away FC",
+        "commence_time": "2025-03-10T18:00:00Z",
+        "bookmakers": [
+            {
+                "key": "pinnacle",
+                "markets": [
+                    {
+                        "key": "h2h",
+                        "last_update": "2025-03-10T12:00:00Z",
+                        "outcomes": [
+                            {"name": "Home FC", "price": 2.10},
+                            {"name": "Draw", "price": 3.40},
+                            {"name": "Away FC", "price": 3.60}
+                        ]
+                    }
+                ]
+            }
+        ]
+    }
+
+
+def make_client(handler):
+    """Cliente con transporte simulado; devuelve (cliente, lista de peticiones)"""
+    requests = []
+
+    def recording_handler(request):
+        requests.append(request)
+        return handler(request)
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(recording_handler))
+    return TheOddsAPIClient(api_key="test", client=http_client), requests
+
+
+class TestCache:
+    """Tests de la caché LRU con expiración"""
+
+    def test_cache_hit(self):
+        """Test que una clave guardada se devuelve mientras no expire"""
+        client, _ = make_client(lambda request: httpx.Response(200, json=[]))
+        client._cache_set(("market", "totals", "m1", "soccer_epl"), ("a",))
+
+        assert client._cache_get(("market", "totals", "m1", "soccer_epl")) == ("a",)
+        assert client._cache_get(("market", "btts", "m1", "soccer_epl")) is None
+
+    def test_cache_expires_after_ttl(self):
+        """Test que una entrada deja de servirse pasado CACHE_TTL"""
+        client, _ = make_client(lambda request: httpx.Response(200, json=[]))
+        key = ("match_odds", "m1", "soccer_epl")
+
+        with patch("src.apis.the_odds_api.time.monotonic", return_value=1000.0):
+            client._cache_set(key, "value")
+        with patch("src.apis.the_odds_api.time.monotonic", return_value=1000.0 + client.CACHE_TTL):
+            assert client._cache_get(key) == "value"
+        with patch("src.apis.the_odds_api.time.monotonic", return_value=1000.0 + client.CACHE_TTL + 1):
+            assert client._cache_get(key) is None
+
+        assert key not in client._cache
+
+    def test_cache_evicts_least_recently_used(self):
+        """Test que al superar CACHE_MAXSIZE se descarta la entrada menos usada"""
+        client, _ = make_client(lambda request: httpx.Response(200, json=[]))
+        client.CACHE_MAXSIZE = 2
+
+        client._cache_set(("k", "1"), 1)
+        client._cache_set(("k", "2"), 2)
+        client._cache_get(("k", "1"))  # "1" pasa a ser la más reciente
+        client._cache_set(("k", "3"), 3)
+
+        assert len(client._cache) == 2
+        assert client._cache_get(("k", "2")) is None
+        assert client._cache_get(("k", "1")) == 1
+        assert client._cache_get(("k", "3")) == 3
+
+    def test_match_odds_and_market_h2h_keys_are_separate(self):
+        """Test que get_match_odds y get_market_odds("h2h") no comparten entrada"""
+        client, requests = make_client(lambda request: httpx.Response(200, json=make_event()))
+
+        async def run():
+            match_odds = await client.get_match_odds("match_1", "soccer_epl")
+            market_odds = await client.get_market_odds("match_1", "soccer_epl", "h2h")
+            cached_match_odds = await client.get_match_odds("match_1", "soccer_epl")
+            cached_market_odds = await client.get_market_odds("match_1", "soccer_epl", "h2h")
+            return match_odds, market_odds, cached_match_odds, cached_market_odds
+
+        match_odds, market_odds, cached_match_odds, cached_market_odds = asyncio.run(run())
+
+        # Una petición por método; las repeticiones salen de la caché
+        assert len(requests) == 2
+        assert isinstance(match_odds, tuple) and isinstance(match_odds[1][0], H2HOdds)
+        assert isinstance(market_odds, list) and isinstance(market_odds[0], dict)
+        assert market_odds[0]["bookmaker"] == BookmakerType.PINNACLE
+        assert cached_match_odds == match_odds
+        assert cached_market_odds == market_odds
+
+
+class TestBulkOdds:
+    """Tests de las cuotas h2h obtenidas en bloque por liga"""
+
+    def test_bulk_parse_matches_per_match_path(self):
+        """Test que get_odds_bulk produce las mismas cuotas que get_match_odds"""
+        events = [make_event("match_1"), make_event("match_2")]
+
+        def handler(request):
+            if request.url.path.endswith("/sports/soccer_epl/odds"):
+                return httpx.Response(200, json=events)
+            return httpx.Response(200, json=events[0])
+
+        client, requests = make_client(handler)
+
+        async def run():
+            bulk = await client.get_odds_bulk("soccer_epl")
+            single = await client.get_match_odds("match_1", "soccer_epl")
+            return bulk, single
+
+        bulk, (single_odds, single_h2h) = asyncio.run(run())
+
+        assert set(bulk) == {"match_1", "match_2"}
+        bulk_odds, bulk_h2h = bulk["match_1"]
+        assert bulk_h2h == single_h2h
+        assert bulk_odds == single_odds
+        assert bulk_h2h[0].bookmaker == BookmakerType.PINNACLE
+        assert (bulk_h2h[0].home_odds, bulk_h2h[0].draw_odds, bulk_h2h[0].away_odds) == (2.10, 3.40, 3.60)
+        assert len(requests) == 2
+
+    def test_bulk_served_from_cache(self):
+        """Test que repetir get_odds_bulk de una liga no repite la petición"""
+        client, requests = make_client(lambda request: httpx.Response(200, json=[make_event("match_1")]))
+
+        async def run():
+            first = await client.get_odds_bulk("soccer_epl")
+            first["match_1"][0].clear()  # Modificar el resultado no altera la caché
+            second = await client.get_odds_bulk("soccer_epl")
+            return second
+
+        second = asyncio.run(run())
+
+        assert len(requests) == 1
+        assert len(second["match_1"][0]) == 2
+        assert second["match_1"][1][0].bookmaker == BookmakerType.PINNACLE
+
+    def test_bulk_returns_none_on_http_error(self):
+        """Test que un fallo del endpoint en bloque devuelve None (se usa la petición por partido)"""
+        client, _ = make_client(lambda request: httpx.Response(500, json={}))
+
+        assert asyncio.run(client.get_odds_bulk("soccer_epl")) is None
+
+
+class TestParseH2H:
+    """Tests de la conversión de eventos h2h en cuotas"""
+
+    def test_invalid_prices_are_skipped(self):
+        """Test que cuotas 0, 1.0 o no numéricas no generan H2HOdds ni doble oportunidad"""
+        client, _ = make_client(lambda request: httpx.Response(200, json=[]))
+        event = make_event()
+        valid = event["bookmakers"][0]
+        for key, price in (("betsson", 0), ("marathonbet", 1.0), ("codere_it", "abc")):
+            bookmaker = {"key": key, "markets": [dict(valid["markets"][0])]}
+            bookmaker["markets"][0]["outcomes"] = [
+                {"name": "Home FC", "price": 2.10},
+                {"name": "Draw", "price": price},
+                {"name": "Away FC", "price": 3.60}
+            ]
+            event["bookmakers"].append(bookmaker)
+
+        all_odds, h2h_odds = client._parse_h2h_event(event)
+
+        assert [h2h.bookmaker for h2h in h2h_odds] == [BookmakerType.PINNACLE]
+        assert {odds.bookmaker for odds in all_odds} == {BookmakerType.PINNACLE}
+        assert h2h_odds[0].overround_percentage > 0
+
+
+class TestRetries:
+    """Tests de los reintentos de _get"""
+
+    def run_get(self, responses):
+        """Ejecuta _get con respuestas/excepciones en secuencia; devuelve (respuesta, esperas, peticiones)"""
+        pending = list(responses)
+
+        def handler(request):
+            item = pending.pop(0)
+            if isinstance(item, Exception):
+                raise item
+            return item
+
+        client, requests = make_client(handler)
+        sleeps = []
+
+        async def fake_sleep(delay):
+            sleeps.append(delay)
+
+        with patch("src.apis.the_odds_api.asyncio.sleep", side_effect=fake_sleep):
+            response = asyncio.run(client._get("https://example.test/odds", {}))
+        return response, sleeps, requests
+
+    def test_429_with_retry_after_then_success(self):
+        """Test que un 429 con Retry-After espera lo indicado y reintenta"""
+        response, sleeps, requests = self.run_get([
+            httpx.Response(429, headers={"retry-after": "7"}),
+            httpx.Response(200, json=[]),
+        ])
+
+        assert response.status_code == 200
+        assert sleeps == [7.0]
+        assert len(requests) == 2
+
+    def test_429_without_retry_after_then_success(self):
+        """Test que un 429 sin Retry-After usa espera exponencial"""
+        response, sleeps, requests = self.run_get([
+            httpx.Response(429),
+            httpx.Response(429),
+            httpx.Response(200, json=[]),
+        ])
+
+        assert response.status_code == 200
+        assert sleeps == [1, 2]
+        assert len(requests) == 3
+
+    def test_transport_error_then_success(self):
+        """Test que un timeout o fallo de conexión se reintenta"""
+        response, sleeps, requests = self.run_get([
+            httpx.ConnectTimeout("timeout"),
+            httpx.ConnectError("connection refused"),
+            httpx.Response(200, json=[]),
+        ])
+
+        assert response.status_code == 200
+        assert sleeps == [1, 2]
+
+    def test_transport_error_exhausts_retries(self):
+        """Test que el error de red se propaga tras MAX_RETRIES reintentos"""
+        errors = [httpx.ReadTimeout("timeout") for _ in range(TheOddsAPIClient.MAX_RETRIES + 1)]
+
+        with pytest.raises(httpx.ReadTimeout):
+            self.run_get(errors)
+
+
+class TestFetchLeague:
+    """Tests de la obtención de partidos por liga"""
+
+    def test_events_without_teams_are_skipped(self):
+        """Test que los eventos con equipos null, vacíos o ausentes no generan partidos"""
+        events = [
+            make_event("valid"),
+            {"id": "null_home", "home_team": None, "away_team": "Away FC",
+             "commence_time": "2025-03-10T18:00:00Z"},
+            {"id": "empty_away", "home_team": "Home FC", "away_team": "",
+             "commence_time": "2025-03-10T18:00:00Z"},
+            {"id": "outright", "commence_time": "2025-03-10T18:00:00Z"},
+            {"id": 123, "home_team": "Home FC", "away_team": "Away FC",
+             "commence_time": "2025-03-10T18:00:00Z"},
+        ]
+        client, _ = make_client(lambda request: httpx.Response(200, json=events))
+
+        matches = asyncio.run(client._fetch_league(
+            "soccer_epl", "EPL", "England", "eu", asyncio.Semaphore(1)
+        ))
+
+        # El evento válido se conserva aunque otros de la liga se descarten
+        assert [m.id for m in matches] == ["valid"]
+        assert str(matches[0]) == "Home FC vs Away FC"
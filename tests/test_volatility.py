@@ -0,0 +1,36 @@
+"""
+Tests para el cálculo vectorizado de volatilidad
+"""
+
+import numpy as np
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from src.kernels.volatility import pad_odds, batch_volatility
+
+
+class TestBatchVolatility:
+    """Tests de la volatilidad calculada en bloque"""
+    
+    def test_pad_odds(self):
+        """Test que las filas cortas se rellenan con NaN"""
+        odds_2d = pad_odds([[1.40, 1.50], [1.80]])
+        
+        assert odds_2d.shape == (2, 2)
+        assert odds_2d[0].tolist() == [1.40, 1.50]
+        assert odds_2d[1, 0] == 1.80
+        assert np.isnan(odds_2d[1, 1])
+    
+    def test_batch_volatility_matches_per_row(self):
+        """Test que cada fila coincide con la desviación estándar relativa individual"""
+        rows = [[1.40, 1.50], [1.90, 1.85, 1.70], [1.80]]
+        volatility = batch_volatility(pad_odds(rows))
+        
+        for row, value in zip(rows[:2], volatility[:2]):
+            expected = np.std(row) / np.mean(row) * 100
+            assert abs(value - expected) < 1e-9
+        
+        # Menos de 2 cuotas: sin volatilidad
+        assert np.isnan(volatility[2])